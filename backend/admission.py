@@ -0,0 +1,159 @@
+"""
+Admission control for the analyze endpoint: in-flight limiting and per-client rate limits
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/sec refill, holds at most `burst`."""
+    rate: float
+    burst: float
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = self.burst
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self):
+        self.tokens -= 1.0
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    status_code: int = 200
+    reason: Optional[str] = None
+    retry_after: int = 0
+
+
+class AdmissionController:
+    """
+    Decides whether an analysis request may start.
+
+    Three budgets are checked, cheapest first:
+      1. per-IP token bucket        → 429 when empty
+      2. per-session token bucket   → 429 when empty
+      3. global in-flight analyses  → 503 when at capacity
+
+    `admit()` runs before the body is read and takes the rate tokens (it also
+    turns requests away early if every slot is busy right now, without
+    reserving one). The in-flight slot itself is only held around the
+    CPU-bound analysis: `try_acquire_slot()` after the upload has been read,
+    then `release()` exactly once for every slot acquired — so slow uploads
+    cannot tie up analysis capacity.
+    """
+
+    def __init__(self, config: dict):
+        self.max_inflight = config["analyze_max_inflight"]
+        self.ip_rate = config["analyze_ip_rate_per_sec"]
+        self.ip_burst = config["analyze_ip_burst"]
+        self.session_rate = config["analyze_session_rate_per_sec"]
+        self.session_burst = config["analyze_session_burst"]
+        self.max_tracked_clients = config["analyze_max_tracked_clients"]
+
+        self.inflight = 0
+        self.ip_buckets: dict[str, TokenBucket] = {}
+        self.session_buckets: dict[str, TokenBucket] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def admit(self, client_ip: str, session_id: str) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            ip_bucket = self._bucket(self.ip_buckets, client_ip, self.ip_rate, self.ip_burst, now)
+            wait = ip_bucket.wait_time(now)
+            if wait > 0:
+                return self._reject("rejected_ip_rate", 429, "Too many requests from this client", wait)
+
+            session_bucket = self._bucket(
+                self.session_buckets, session_id, self.session_rate, self.session_burst, now
+            )
+            wait = session_bucket.wait_time(now)
+            if wait > 0:
+                return self._reject("rejected_session_rate", 429, "Too many requests for this session", wait)
+
+            # Not worth receiving an upload that has nowhere to run
+            if self.inflight >= self.max_inflight:
+                return self._reject("rejected_capacity", 503, "Server busy, try again shortly", 1.0)
+
+            ip_bucket.take()
+            session_bucket.take()
+            self.counters["admitted"] += 1
+            return Decision(allowed=True)
+
+    def try_acquire_slot(self) -> Decision:
+        with self._lock:
+            if self.inflight >= self.max_inflight:
+                return self._reject("rejected_capacity", 503, "Server busy, try again shortly", 1.0)
+            self.inflight += 1
+            return Decision(allowed=True)
+
+    def release(self):
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+
+    def record(self, counter: str):
+        """Count a rejection decided outside the controller (e.g. bad session state)."""
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "inflight": self.inflight,
+                "max_inflight": self.max_inflight,
+                "tracked_ips": len(self.ip_buckets),
+                "tracked_sessions": len(self.session_buckets),
+                "counters": dict(self.counters),
+            }
+
+    def _reject(self, counter: str, status_code: int, reason: str, wait: float) -> Decision:
+        self.counters[counter] += 1
+        return Decision(
+            allowed=False,
+            status_code=status_code,
+            reason=reason,
+            retry_after=max(1, math.ceil(wait)),
+        )
+
+    def _bucket(self, buckets: dict, key: str, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.max_tracked_clients:
+                self._evict_full(buckets, now)
+            bucket = TokenBucket(rate=rate, burst=burst, updated_at=now)
+            buckets[key] = bucket
+        return bucket
+
+    @staticmethod
+    def _evict_full(buckets: dict, now: float):
+        """Drop buckets that have refilled completely — they carry no state."""
+        full = [
+            k for k, b in buckets.items()
+            if b.tokens + (now - b.updated_at) * b.rate >= b.burst
+        ]
+        for k in full:
+            del buckets[k]
+        # Every client is actively limited: drop the least recently seen half
+        if not full:
+            oldest = sorted(buckets, key=lambda k: buckets[k].updated_at)
+            for k in oldest[: max(1, len(oldest) // 2)]:
+                del buckets[k]
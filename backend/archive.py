@@ -0,0 +1,60 @@
+"""
+Opt-in on-disk archive of analyzed recordings, for offline re-scoring (see rescore.py)
+"""
+
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from shared_store import atomic_write
+
+
+class RecordingArchive:
+    """
+    Stores each analyzed recording as one compressed .npz file:
+
+        pcm        int16 mono audio at the rate it was uploaded (22.05 kHz from
+                   the web client, about half the size of the analysis rate)
+        f0         float32 pyin track (NaN = unvoiced), reused by re-scoring
+        meta       target pitch, round, live verdict and the extraction key
+
+    Files are sharded by UTC day: <root>/<YYYYMMDD>/<time>-<session>-r<round>-<id>.npz
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def save(self, samples: np.ndarray, sr: int, f0: np.ndarray, extraction_key: str, meta: dict):
+        now = datetime.utcnow()
+        day_dir = self.root / f"{now:%Y%m%d}"
+        day_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{now:%H%M%S}-{meta['session_id'][:8]}-r{meta['round']}-{uuid.uuid4().hex[:6]}.npz"
+
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+        # Readers never see a half-written file
+        with atomic_write(day_dir / name) as fh:
+            np.savez_compressed(
+                fh,
+                pcm=pcm,
+                sr=np.int32(sr),
+                f0=f0.astype(np.float32),
+                extraction_key=np.str_(extraction_key),
+                target_hz=np.float64(meta["target_hz"]),
+                round=np.int8(meta["round"]),
+                shift=np.int8(meta["shift"]),
+                passed=np.bool_(meta["passed"]),
+                performance_score=np.int32(meta["performance_score"]),
+            )
+
+    def paths(self) -> list[Path]:
+        # Dot-prefixed files are in-progress writes
+        return sorted(p for p in self.root.glob("*/*.npz") if not p.name.startswith("."))
+
+    @staticmethod
+    def load(path: Path) -> dict:
+        with np.load(path) as data:
+            record = {key: data[key] for key in data.files}
+        record["extraction_key"] = str(record["extraction_key"])
+        return record
@@ -17,12 +17,23 @@ class AudioProcessor:
         self.fmin = librosa.note_to_hz("C3")  # ~130 Hz
         self.fmax = librosa.note_to_hz("C7")  # ~2093 Hz
         self.hop_length = 512
+        self.frame_length = 2048  # librosa.pyin default
 
     def load_audio(self, audio_bytes: bytes) -> np.ndarray:
         """Load audio from WAV bytes, convert to mono float."""
         y, _ = librosa.load(io.BytesIO(audio_bytes), sr=self.sr, mono=True)
         return y
 
+    def extraction_key(self) -> str:
+        """Identifies the pitch-tracking parameters; f0 tracks are only reusable under the same key."""
+        return f"pyin-sr{self.sr}-hop{self.hop_length}-{self.fmin:.2f}-{self.fmax:.2f}"
+
+    def load_pcm(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Resample already-decoded mono float samples to the analysis rate."""
+        if sr != self.sr:
+            y = librosa.resample(y, orig_sr=sr, target_sr=self.sr)
+        return y
+
     def extract_contour(self, y: np.ndarray) -> dict:
         """
         Extract pitch contour from audio signal.
@@ -35,14 +46,41 @@ class AudioProcessor:
                 "voiced_ratio": float (0-1, proportion of voiced frames)
             }
         """
+        return self.contour_from_f0(self.track_f0(y))
+
+    def track_f0(
+        self, y: np.ndarray, center: bool = True, fmin: float | None = None, fmax: float | None = None
+    ) -> np.ndarray:
+        """
+        Run pyin and return the f0 track (Hz, NaN for unvoiced).
+
+        With center=False, frame i is centred on sample i * hop_length + frame_length // 2,
+        which lets callers track a slice of a longer signal on the same frame grid.
+        fmin/fmax narrow the search band (default: the full fmin..fmax range);
+        pyin's Viterbi pass costs in proportion to the number of pitch bins.
+        """
         f0, voiced_flag, voiced_probs = librosa.pyin(
             y,
-            fmin=self.fmin,
-            fmax=self.fmax,
+            fmin=self.fmin if fmin is None else fmin,
+            fmax=self.fmax if fmax is None else fmax,
             sr=self.sr,
             hop_length=self.hop_length,
+            frame_length=self.frame_length,
+            center=center,
         )
+        return f0
+
+    def frame_rms(self, y: np.ndarray) -> np.ndarray:
+        """RMS of each frame, on the same (centred) frames as track_f0."""
+        return librosa.feature.rms(y=y, frame_length=self.frame_length, hop_length=self.hop_length)[0]
 
+    def contour_from_f0(self, f0: np.ndarray) -> dict:
+        """
+        Derive the contour dict from an f0 track (same shape as extract_contour).
+
+        Split out from extract_contour so archived f0 tracks can be re-scored
+        without re-running pyin.
+        """
         voiced_ratio = np.sum(~np.isnan(f0)) / len(f0)
         median_hz = float(np.nanmedian(f0)) if voiced_ratio > CONFIG["min_voiced_ratio"] else 0.0
 
@@ -2,6 +2,8 @@
 Configuration and tuning parameters for FIGHT UWU BIRD
 """
 
+import os
+
 CONFIG = {
     # Pitch shift per round (in semitones)
     # Start low, gradually increase difficulty
@@ -29,9 +31,69 @@ CONFIG = {
     # Recording
     "recording_duration_sec": 3,   # How long to record player input
     "silence_threshold_db": -35,     # Below this = silence
+    "max_audio_bytes": 5 * 1024 * 1024,  # Upload cap (a 3s mono WAV at 44100 Hz is ~265 KB)
+    # Client-computed contours: checked against the energy and YIN pitch of the whole
+    # recording, then a few random windows are re-tracked with pyin. A contour that
+    # contradicts the audio fails the round; one that cannot be checked (too short,
+    # wrong duration) falls back to full server analysis.
+    "verify_windows": 3,                  # Windows re-tracked with pyin per submission
+    "verify_window_frames": 20,           # ≈ 0.23 s per window
+    "verify_max_semitone_error": 1.0,     # Max median |client - server| within a window
+    "verify_max_unsupported_voiced": 0.25,  # Max share of client-voiced frames pyin calls unvoiced
+    "verify_max_duration_mismatch_sec": 0.25,
+    "verify_energy_floor_db": -40.0,      # Frames quieter than this relative to the loudest are silence
+    "verify_max_silent_voiced": 0.1,      # Max fraction of client-voiced frames that are silent
+    "verify_loud_floor_db": -20.0,        # Frames this close to the peak (and this far above the noise) are loud
+    "verify_min_loud_voiced": 0.6,        # Min fraction of loud frames the client must call voiced
+    "verify_max_median_error_st": 1.0,    # Max |client - YIN| median pitch over the whole recording
 
     # Audio
     "preroll_silence_sec": 0.4,      # Silence prepended to each bird call (wakes Bluetooth/sleeping audio devices)
     "sample_rate": 44100,
     "hop_length": 512,
+
+    # Opt-in archive of analyzed recordings for offline re-scoring (backend/rescore.py).
+    # Unset = disabled. Each recording is one compressed .npz at its upload rate
+    # (at most ~130 KB for a 3 s take from the web client at 22.05 kHz).
+    "archive_dir": os.environ.get("RECORDING_ARCHIVE_DIR") or None,
+
+    # Leaderboard: boards are read from Postgres and pushed over SSE (/api/leaderboard/stream)
+    "leaderboard_size": 8,
+    "leaderboard_stream_max_clients": 1000,
+    "leaderboard_stream_queue_size": 32,  # Events a slow client may lag behind before it is dropped
+    "leaderboard_stream_keepalive_sec": 15,
+    "leaderboard_stream_reload_sec": 5,   # Reload from the DB while subscribed (other workers' inserts, rollovers)
+
+    # Replay detection: MinHash fingerprints of winning recordings (backend/replay_index.py)
+    "replay_index_capacity": 200_000,     # Most recent distinct winning recordings kept (~197 B each)
+    "replay_similarity_threshold": 0.65,  # Estimated Jaccard at/above which a win counts as a replay
+    "replay_index_path": os.environ.get("REPLAY_INDEX_PATH") or None,  # Optional snapshot file
+    "replay_snapshot_every": 1000,        # New fingerprints between snapshots (also saved on shutdown)
+    "replay_sync_sec": 10,                # With a snapshot: save new fingerprints and add other workers' this often
+
+    # Visualization payloads — max points per contour / chart trace (LTTB decimation).
+    # Clients may request a different budget via ?max_points=, clamped to the bounds below.
+    "viz_max_points": 64,
+    "viz_min_points": 16,
+    "viz_max_points_limit": 1024,
+
+    # Admission control for POST /api/game/{id}/analyze
+    # In-flight cap defaults to one analysis per core — pyin + DTW are CPU-bound,
+    # so queueing more than that only adds latency for everyone. Override with
+    # ANALYZE_MAX_INFLIGHT when the container's CPU quota is below the host's core count.
+    "analyze_max_inflight": int(os.environ.get("ANALYZE_MAX_INFLIGHT") or 0) or os.cpu_count() or 1,
+    "analyze_ip_rate_per_sec": 0.5,        # Sustained analyses per client IP
+    "analyze_ip_burst": 6,                 # Short bursts allowed per client IP
+    "analyze_session_rate_per_sec": 0.25,  # A real round takes ≥ 3 s of recording
+    "analyze_session_burst": 3,
+    "analyze_max_tracked_clients": 10000,  # Bound on token buckets kept in memory
+    # Proxies in front of the app that append to X-Forwarded-For (1 = the Railway edge).
+    # The client IP is the entry that many hops from the right; anything further left
+    # is client-supplied and spoofable. 0 ignores the header and uses the socket peer.
+    "trusted_proxy_hops": int(os.environ.get("TRUSTED_PROXY_HOPS") or 1),
+
+    # On-demand profiling (admin only; requires ADMIN_TOKEN env var)
+    "profile_dir": "profiles",       # Ring buffer directory for captured profiles
+    "profile_max_files": 50,         # Oldest profiles are deleted beyond this
+    "profile_interval_ms": 5,        # Stack sampling interval
 }
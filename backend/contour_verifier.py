@@ -0,0 +1,273 @@
+"""
+Verification of client-computed pitch contours against short server-tracked windows
+"""
+
+import json
+import random
+
+import librosa
+import numpy as np
+from fastapi import HTTPException
+
+from audio_processor import AudioProcessor
+
+# Frames at each end of a window are skipped when comparing; pyin's
+# Viterbi decode is less certain there than on the full recording.
+_EDGE_FRAMES = 2
+# Frame RMS below this counts as silence whatever the recording's level
+_MIN_RMS = 1e-4
+# Fewer loud frames than this (a quiet or noisy take) skips the loud-coverage check
+_MIN_LOUD_FRAMES = 8
+
+# Windows are re-tracked with pyin within this many semitones of the
+# recording's YIN median. A call stays well inside it, and keeping it short
+# of an octave stops pyin locking onto the octave below at a call's onset.
+_BAND_SEMITONES = 9
+
+# Verification failures that mean the contour does not describe the audio,
+# as opposed to a clip the verifier simply cannot check (too short, trimmed)
+TAMPER_REASONS = ("voicing_mismatch", "pitch_mismatch", "window_mismatch", "track_mismatch")
+
+
+def _compare_frames(client: np.ndarray, server: np.ndarray) -> tuple[float, float]:
+    """
+    (share of client-voiced frames the server calls unvoiced, median semitone
+    error over frames both call voiced) for two f0 tracks on the same frames.
+    """
+    server_voiced, client_voiced = ~np.isnan(server), ~np.isnan(client)
+    # Only frames the client calls voiced but pyin does not count against it:
+    # pyin voices breathy onsets and tails that the browser's YIN leaves out
+    unsupported = float((client_voiced & ~server_voiced).sum() / max(client_voiced.sum(), 4))
+    both = server_voiced & client_voiced
+    error = float(np.median(np.abs(12 * np.log2(client[both] / server[both])))) if both.sum() >= 3 else 0.0
+    return unsupported, error
+
+
+class ContourVerifier:
+    """
+    Accepts a browser-computed f0 track only if it agrees with the audio.
+
+    Two checks, cheapest first:
+      1. the whole recording: frames the client calls voiced must have
+         energy, the loudest frames must mostly be voiced, and the median
+         pitch must match a YIN pass over the same frames
+      2. a few windows drawn uniformly over the recording with the OS RNG
+         (voiced or not, so a client cannot steer them) are re-tracked with
+         one band-limited pyin call and compared frame by frame
+    """
+
+    def __init__(self, processor: AudioProcessor, config: dict):
+        self.processor = processor
+        self.n_windows = config["verify_windows"]
+        self.window_frames = config["verify_window_frames"]
+        self.max_semitone_error = config["verify_max_semitone_error"]
+        self.max_unsupported_voiced = config["verify_max_unsupported_voiced"]
+        self.max_duration_mismatch_sec = config["verify_max_duration_mismatch_sec"]
+        self.energy_floor_db = config["verify_energy_floor_db"]
+        self.max_silent_voiced = config["verify_max_silent_voiced"]
+        self.loud_floor_db = config["verify_loud_floor_db"]
+        self.min_loud_voiced = config["verify_min_loud_voiced"]
+        self.max_median_error = config["verify_max_median_error_st"]
+        self.rng = random.SystemRandom()
+
+    def parse(self, fields: dict, n_samples: int, offset_samples: int = 0) -> tuple[np.ndarray, float] | None:
+        """
+        Map the submitted f0 track onto the server frame grid.
+
+        Expects form fields `f0` (JSON list of Hz, 0/null = unvoiced),
+        `f0_hop_sec` and optionally `f0_start_sec` (time of the first value).
+        `offset_samples` were dropped from the start of the recording before
+        server tracking (replay_index.grid_offset); `n_samples` is what is left.
+        Returns (f0 per server frame, duration covered by the client track from
+        the offset), or None if the client didn't send a contour.
+        """
+        if "f0" not in fields:
+            return None
+        try:
+            values = np.array(
+                [np.nan if v is None or v <= 0 else float(v) for v in json.loads(fields["f0"])],
+                dtype=np.float64,
+            )
+            hop_sec = float(fields["f0_hop_sec"])
+            start_sec = float(fields.get("f0_start_sec", 0.0))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Malformed client contour")
+        if len(values) == 0 or not 0.001 <= hop_sec <= 0.1 or not 0.0 <= start_sec <= 1.0:
+            raise HTTPException(400, "Malformed client contour")
+        if np.nanmax(values, initial=0.0) > 10 * self.processor.fmax:
+            raise HTTPException(400, "Malformed client contour")
+
+        # Nearest client value for each server frame (pyin, center=True)
+        sr, hop = self.processor.sr, self.processor.hop_length
+        n_frames = 1 + n_samples // hop
+        frame_times = (np.arange(n_frames) * hop + offset_samples) / sr
+        idx = np.rint((frame_times - start_sec) / hop_sec).astype(np.int64)
+        f0 = np.full(n_frames, np.nan)
+        valid = (idx >= 0) & (idx < len(values))
+        f0[valid] = values[idx[valid]]
+        return f0, start_sec + len(values) * hop_sec - offset_samples / sr
+
+    def verify(self, y: np.ndarray, client_f0: np.ndarray, client_duration_sec: float) -> dict:
+        """
+        Check `client_f0` against the whole of `y`, then re-track a few windows with pyin.
+
+        Returns {"ok": bool, "reason": str | None, "tampered": bool, "overall": {...},
+        "windows": [...]}: whole-recording stats, then one entry per checked
+        window with the share of its client-voiced frames that pyin calls
+        unvoiced and its median semitone error. `tampered` is set when the
+        reason is one of TAMPER_REASONS.
+        """
+        result = self._verify(y, client_f0, client_duration_sec)
+        result["tampered"] = result["reason"] in TAMPER_REASONS
+        return result
+
+    def compare(self, n_samples: int, server_f0: np.ndarray, client_f0: np.ndarray, client_duration_sec: float) -> dict:
+        """
+        Check `client_f0` against a pyin track of the whole recording.
+
+        For rounds that are tracked server-side anyway (a client track that
+        wins is re-scored from pyin): the window test of verify() run over
+        every frame, at no extra tracking cost. Returns the same shape as
+        verify(), with the whole-track stats under "overall" and no windows.
+        """
+        if abs(client_duration_sec - n_samples / self.processor.sr) > self.max_duration_mismatch_sec:
+            return {"ok": False, "reason": "duration_mismatch", "tampered": False, "overall": {}, "windows": []}
+        unsupported, error = _compare_frames(client_f0, server_f0)
+        # A median over the whole track would let a tampered stretch through,
+        # so the share of frames off by more than a window's limit is capped too
+        both = ~np.isnan(client_f0) & ~np.isnan(server_f0)
+        off = np.abs(12 * np.log2(client_f0[both] / server_f0[both])) > self.max_semitone_error
+        off_pitch = float(off.sum() / max(both.sum(), 4))
+        ok = (
+            unsupported <= self.max_unsupported_voiced
+            and error <= self.max_semitone_error
+            and off_pitch <= self.max_unsupported_voiced
+        )
+        return {
+            "ok": ok,
+            "reason": None if ok else "track_mismatch",
+            "tampered": not ok,
+            "overall": {
+                "unsupported_voiced": round(unsupported, 3),
+                "median_error_st": round(error, 3),
+                "off_pitch": round(off_pitch, 3),
+            },
+            "windows": [],
+        }
+
+    def _verify(self, y: np.ndarray, client_f0: np.ndarray, client_duration_sec: float) -> dict:
+        if abs(client_duration_sec - len(y) / self.processor.sr) > self.max_duration_mismatch_sec:
+            return {"ok": False, "reason": "duration_mismatch", "overall": {}, "windows": []}
+
+        hop, frame_length = self.processor.hop_length, self.processor.frame_length
+        n = self.window_frames
+        # Window [a, a + n) needs frame_length // 2 samples of context on both sides
+        first = -(-(frame_length // 2) // hop)
+        last = (len(y) - frame_length // 2) // hop - n
+        if last < first:
+            # Too short to window; full analysis of a clip this short is cheap anyway
+            return {"ok": False, "reason": "too_short", "overall": {}, "windows": []}
+
+        overall = self._check_overall(y, client_f0)
+        if overall["reason"] is not None:
+            return {"ok": False, "reason": overall.pop("reason"), "overall": overall, "windows": []}
+        del overall["reason"]
+
+        starts = sorted(self.rng.sample(range(first, last + 1), min(self.n_windows, last + 1 - first)))
+
+        windows = []
+        ok = True
+        for a, server in zip(starts, self._track_windows(y, starts, overall["server_median_hz"])):
+            client = client_f0[a + _EDGE_FRAMES : a + n - _EDGE_FRAMES]
+            unsupported, error = _compare_frames(client, server)
+            passed = unsupported <= self.max_unsupported_voiced and error <= self.max_semitone_error
+            ok = ok and passed
+            windows.append({
+                "start_frame": int(a),
+                "unsupported_voiced": round(unsupported, 3),
+                "median_error_st": round(error, 3),
+                "passed": passed,
+            })
+        return {"ok": ok, "reason": None if ok else "window_mismatch", "overall": overall, "windows": windows}
+
+    def _track_windows(self, y: np.ndarray, starts: list[int], center_hz: float) -> list[np.ndarray]:
+        """
+        Re-track all windows in a single pyin call, edge frames dropped.
+
+        Each window is cut out with its frame context and zero-padded to
+        `stride` hops, so window j's frame i is frame j * stride + i of the
+        joined signal. pyin is searched only within _BAND_SEMITONES of the
+        recording's YIN median, which cuts its Viterbi pass to under a fifth.
+        """
+        hop, frame_length = self.processor.hop_length, self.processor.frame_length
+        n = self.window_frames
+        stride = n + -(-(frame_length - hop) // hop)
+        joined = np.zeros(len(starts) * stride * hop, dtype=y.dtype)
+        for j, a in enumerate(starts):
+            s0 = a * hop - frame_length // 2
+            segment = y[s0 : s0 + (n - 1) * hop + frame_length]
+            joined[j * stride * hop : j * stride * hop + len(segment)] = segment
+
+        fmin, fmax = self.processor.fmin, self.processor.fmax
+        if center_hz > 0:
+            fmin = max(fmin, center_hz * 2 ** (-_BAND_SEMITONES / 12))
+            fmax = min(fmax, center_hz * 2 ** (_BAND_SEMITONES / 12))
+        f0 = self.processor.track_f0(joined, center=False, fmin=fmin, fmax=fmax)
+        return [f0[j * stride + _EDGE_FRAMES : j * stride + n - _EDGE_FRAMES] for j in range(len(starts))]
+
+    def _check_overall(self, y: np.ndarray, client_f0: np.ndarray) -> dict:
+        """
+        Whole-recording comparison against frame energy and YIN — a few
+        percent of a pyin pass, so every frame the client sent is covered.
+
+        Catches voicing claimed in silence, loud passages left out (dropping
+        the low notes raises the median) and a pitch track moved off the audio.
+        """
+        hop, frame_length = self.processor.hop_length, self.processor.frame_length
+        # Same centred frame grid as pyin, so frame i lines up with client_f0[i]
+        rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop)[0][: len(client_f0)]
+        peak = rms.max(initial=0.0)
+        sounding = rms >= max(_MIN_RMS, peak * 10 ** (self.energy_floor_db / 20))
+        # The body of the call: near the peak and well clear of the noise floor
+        loud = rms >= max(
+            peak * 10 ** (self.loud_floor_db / 20),
+            np.percentile(rms, 10) * 10 ** (-self.loud_floor_db / 20) if len(rms) else 0.0,
+        )
+        voiced = ~np.isnan(client_f0[: len(rms)])
+
+        stats = {
+            "client_voiced_ratio": round(float(voiced.mean()), 3),
+            "sounding_ratio": round(float(sounding.mean()), 3),
+            "silent_voiced": round(float((voiced & ~sounding).sum() / max(1, voiced.sum())), 3),
+            "loud_voiced": round(float((voiced & loud).sum() / max(1, loud.sum())), 3),
+            "median_error_st": 0.0,
+            "server_median_hz": 0.0,
+            "reason": None,
+        }
+        if stats["silent_voiced"] > self.max_silent_voiced:
+            stats["reason"] = "voicing_mismatch"
+            return stats
+        if loud.sum() >= _MIN_LOUD_FRAMES and stats["loud_voiced"] < self.min_loud_voiced:
+            stats["reason"] = "voicing_mismatch"
+            return stats
+
+        server = librosa.yin(
+            y,
+            fmin=self.processor.fmin,
+            fmax=self.processor.fmax,
+            sr=self.processor.sr,
+            frame_length=frame_length,
+            hop_length=hop,
+        )[: len(rms)]
+        # Centre of the band the windows are re-tracked in. In a quiet take
+        # the sounding frames are mostly noise, so fall back to the loudest quarter.
+        body = loud if loud.sum() >= _MIN_LOUD_FRAMES else rms >= np.percentile(rms, 75)
+        stats["server_median_hz"] = round(float(np.median(server[body])), 1) if body.any() else 0.0
+
+        both = voiced & sounding
+        if both.sum() >= 3:
+            error = abs(12 * np.log2(np.median(client_f0[: len(rms)][both]) / np.median(server[both])))
+            stats["median_error_st"] = round(float(error), 3)
+            if error > self.max_median_error:
+                stats["reason"] = "pitch_mismatch"
+        return stats
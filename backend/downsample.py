@@ -0,0 +1,56 @@
+"""
+Shape-preserving downsampling for visualization payloads (Largest-Triangle-Three-Buckets)
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Pick `n_out` indices of (x, y) that best preserve the visual shape.
+
+    LTTB keeps the first and last points, splits the rest into n_out - 2
+    equal buckets and, from each bucket, keeps the point forming the largest
+    triangle with the previously kept point and the mean of the next bucket.
+    Unlike a fixed stride, short peaks and dips survive decimation.
+
+    Bucket means are computed in one vectorized pass; only the (inherently
+    sequential) choice of the previous anchor point loops over buckets.
+
+    Returns all indices unchanged if the series already fits the budget.
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    n_out = max(n_out, 3)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket boundaries over the interior points [1, n - 1)
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Mean of each bucket, plus the final point as the "next bucket" of the last one
+    counts = ends - starts
+    mean_x = np.append(np.add.reduceat(x[:-1], starts) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[:-1], starts) / counts, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - mean_x[i + 1]) * (y[s:e] - ay) - (ax - x[s:e]) * (mean_y[i + 1] - ay)
+        )
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def clamp_budget(max_points: int | None, config: dict) -> int:
+    """Resolve a client-requested point budget against the configured bounds."""
+    if max_points is None:
+        return config["viz_max_points"]
+    return int(np.clip(max_points, config["viz_min_points"], config["viz_max_points_limit"]))
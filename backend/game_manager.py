@@ -33,6 +33,7 @@ class GameSession:
     round_contours: list = field(default_factory=list)  # Store contours for each round
     total_score: int = 0
     score_token: Optional[str] = None
+    replay_suspected: bool = False  # A winning round matched an earlier win (see replay_index.py)
 
 
 _SCORE_SECRET = os.environ.get("SCORE_SECRET", uuid.uuid4().hex)
@@ -62,7 +63,7 @@ class GameManager:
             # Player cleared this round — advance
             if session.current_round >= session.max_rounds:
                 session.status = GameStatus.GAME_WON
-                session.score_token = self._sign_score(session_id, session.total_score)
+                self._issue_score_token(session)
             else:
                 session.current_round += 1
                 session.status = GameStatus.WAITING_FOR_PLAYER
@@ -71,13 +72,22 @@ class GameManager:
             session.tries_left -= 1
             if session.tries_left <= 0:
                 session.status = GameStatus.GAME_LOST
-                session.score_token = self._sign_score(session_id, session.total_score)
+                self._issue_score_token(session)
             else:
                 session.status = GameStatus.WAITING_FOR_PLAYER
                 # current_round stays the same — player retries
 
         return session
 
+    def _issue_score_token(self, session: GameSession):
+        """
+        Sign the final score for leaderboard submission — unless a round was
+        flagged as a replay. Withholding the token keeps such a score off the
+        board even after the session itself has expired.
+        """
+        if not session.replay_suspected:
+            session.score_token = self._sign_score(session.session_id, session.total_score)
+
     @staticmethod
     def _sign_score(session_id: str, score: int) -> str:
         msg = f"{session_id}:{score}".encode()
@@ -13,8 +13,31 @@ load_dotenv()
 _DATABASE_URL = None
 
 
+# Time-windowed boards. Each rollup table holds a copy of the entries in
+# recent buckets only, indexed by (bucket, score DESC, created_at), so a
+# window's top-N and ranks never touch the full leaderboard table.
+WINDOWS = ("daily", "weekly", "all")
+
+_ROLLUPS = {
+    "daily": {
+        "table": "leaderboard_daily",
+        "bucket": "(({ts}) AT TIME ZONE 'UTC')::date",
+        "keep": "7 days",
+    },
+    "weekly": {
+        "table": "leaderboard_weekly",
+        "bucket": "date_trunc('week', ({ts}) AT TIME ZONE 'UTC')::date",
+        "keep": "8 weeks",
+    },
+}
+
+
+def _bucket(window: str, ts: str) -> str:
+    return _ROLLUPS[window]["bucket"].format(ts=ts)
+
+
 def init_db():
-    """Read DATABASE_URL from env and create the leaderboard table if needed."""
+    """Read DATABASE_URL from env and create the leaderboard tables if needed."""
     global _DATABASE_URL
     _DATABASE_URL = os.environ.get("DATABASE_URL")
     if not _DATABASE_URL:
@@ -30,9 +53,32 @@ def init_db():
                     score      INTEGER NOT NULL,
                     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
                 );
+                CREATE INDEX IF NOT EXISTS leaderboard_score_idx
+                    ON leaderboard (score DESC, created_at ASC);
             """)
+            for window, rollup in _ROLLUPS.items():
+                table = rollup["table"]
+                cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        entry_id   INTEGER PRIMARY KEY REFERENCES leaderboard (id) ON DELETE CASCADE,
+                        bucket     DATE NOT NULL,
+                        name       VARCHAR(10) NOT NULL,
+                        score      INTEGER NOT NULL,
+                        created_at TIMESTAMPTZ NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS {table}_rank_idx
+                        ON {table} (bucket, score DESC, created_at ASC);
+                """)
+                # Backfill entries still inside the retention period (idempotent)
+                cur.execute(f"""
+                    INSERT INTO {table} (entry_id, bucket, name, score, created_at)
+                    SELECT id, {_bucket(window, "created_at")}, name, score, created_at
+                    FROM leaderboard
+                    WHERE created_at >= {_bucket(window, "NOW()")} - INTERVAL '{rollup["keep"]}'
+                    ON CONFLICT (entry_id) DO NOTHING
+                """)
         conn.commit()
-    print("[LEADERBOARD] Table ready")
+    print("[LEADERBOARD] Tables ready")
 
 
 def _get_conn():
@@ -41,35 +87,62 @@ def _get_conn():
     return psycopg2.connect(_DATABASE_URL)
 
 
-def insert_entry(name: str, score: int):
-    """Insert a leaderboard entry. No-op if DB is not configured."""
+def insert_entry(name: str, score: int) -> int:
+    """
+    Insert a leaderboard entry and update the window rollups in the same
+    transaction. Returns the entry id (0 if DB is not configured).
+    """
     conn = _get_conn()
     if conn is None:
-        return
+        return 0
     try:
         with conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "INSERT INTO leaderboard (name, score) VALUES (%s, %s)",
+                    "INSERT INTO leaderboard (name, score) VALUES (%s, %s) RETURNING id",
                     (name, score),
                 )
+                entry_id = cur.fetchone()[0]
+                for window, rollup in _ROLLUPS.items():
+                    table = rollup["table"]
+                    cur.execute(
+                        f"INSERT INTO {table} (entry_id, bucket, name, score, created_at) "
+                        f"SELECT id, {_bucket(window, 'created_at')}, name, score, created_at "
+                        f"FROM leaderboard WHERE id = %s",
+                        (entry_id,),
+                    )
+                    # Expire old buckets; an index range delete on the leading column
+                    cur.execute(
+                        f"DELETE FROM {table} "
+                        f"WHERE bucket < {_bucket(window, 'NOW()')} - INTERVAL '{rollup['keep']}'"
+                    )
+        return entry_id
     finally:
         conn.close()
 
 
-def get_top(n: int = 8) -> list[dict]:
-    """Return top N entries by score DESC, then earliest first."""
+def get_top(n: int = 8, window: str = "all") -> list[dict]:
+    """Return top N entries of a window by score DESC, then earliest first."""
     conn = _get_conn()
     if conn is None:
         return []
+    if window == "all":
+        query, params = (
+            "SELECT name, score, created_at FROM leaderboard "
+            "ORDER BY score DESC, created_at ASC LIMIT %s",
+            (n,),
+        )
+    else:
+        query, params = (
+            f"SELECT name, score, created_at FROM {_ROLLUPS[window]['table']} "
+            f"WHERE bucket = {_bucket(window, 'NOW()')} "
+            f"ORDER BY score DESC, created_at ASC LIMIT %s",
+            (n,),
+        )
     try:
         with conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(
-                    "SELECT name, score, created_at FROM leaderboard "
-                    "ORDER BY score DESC, created_at ASC LIMIT %s",
-                    (n,),
-                )
+                cur.execute(query, params)
                 rows = cur.fetchall()
         return [
             {
@@ -83,22 +156,40 @@ def get_top(n: int = 8) -> list[dict]:
         conn.close()
 
 
-def get_rank(name: str, score: int) -> int:
-    """Return 1-based rank for a given name+score (most recent matching entry)."""
+def _rank_query(window: str) -> str:
+    if window == "all":
+        return (
+            "SELECT 1 + (SELECT COUNT(*) FROM leaderboard r "
+            "            WHERE r.score > e.score OR (r.score = e.score AND r.created_at < e.created_at)) "
+            "FROM leaderboard e WHERE e.id = %s"
+        )
+    table = _ROLLUPS[window]["table"]
+    return (
+        f"SELECT 1 + (SELECT COUNT(*) FROM {table} r "
+        f"            WHERE r.bucket = e.bucket "
+        f"              AND (r.score > e.score OR (r.score = e.score AND r.created_at < e.created_at))) "
+        f"FROM {table} e WHERE e.entry_id = %s AND e.bucket = {_bucket(window, 'NOW()')}"
+    )
+
+
+def get_rank(entry_id: int, window: str = "all") -> int:
+    """Return 1-based rank of an entry within its window's current bucket (0 if not on that board)."""
+    return get_ranks(entry_id, (window,))[window]
+
+
+def get_ranks(entry_id: int, windows: tuple[str, ...] = WINDOWS) -> dict[str, int]:
+    """get_rank for several windows over one connection and transaction."""
     conn = _get_conn()
     if conn is None:
-        return 0
+        return {w: 0 for w in windows}
     try:
         with conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT COUNT(*) + 1 FROM leaderboard "
-                    "WHERE score > %s OR (score = %s AND created_at < "
-                    "  (SELECT created_at FROM leaderboard "
-                    "   WHERE name = %s AND score = %s "
-                    "   ORDER BY created_at DESC LIMIT 1))",
-                    (score, score, name, score),
-                )
-                return cur.fetchone()[0]
+                ranks = {}
+                for window in windows:
+                    cur.execute(_rank_query(window), (entry_id,))
+                    row = cur.fetchone()
+                    ranks[window] = row[0] if row else 0
+                return ranks
     finally:
         conn.close()
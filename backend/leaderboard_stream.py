@@ -0,0 +1,142 @@
+"""
+Top-N leaderboards mirrored from the database, with server-sent-event fan-out to subscribers
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self, maxsize: int):
+        # One extra slot so the "dropped" sentinel always fits
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize + 1)
+
+
+class LeaderboardBroadcaster:
+    """
+    Mirrors the top-N of every window from the database and pushes changed
+    boards to SSE subscribers.
+
+    The database stays the source of truth: boards are reloaded right after
+    each insert handled by this process, and every `reload_sec` while anyone
+    is subscribed, which picks up inserts made by other workers, rows changed
+    out of band and daily/weekly bucket rollovers. Only boards that differ
+    from the last load are broadcast. Each subscriber has a bounded queue —
+    a client that falls `queue_size` events behind is dropped and reconnects
+    to a fresh snapshot rather than holding memory for a backlog.
+    """
+
+    def __init__(self, windows: tuple[str, ...], load: Callable[[int, str], list[dict]], config: dict):
+        self.windows = windows
+        self.load = load
+        self.n = config["leaderboard_size"]
+        self.queue_size = config["leaderboard_stream_queue_size"]
+        self.max_subscribers = config["leaderboard_stream_max_clients"]
+        self.reload_sec = config["leaderboard_stream_reload_sec"]
+        self.boards: dict[str, list[dict]] = {}
+        self.versions: dict[str, int] = {w: 0 for w in windows}
+        self.loaded_at = 0.0
+        self.subscribers: set[_Subscriber] = set()
+        self.dropped = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> dict[str, list[dict]]:
+        """Reload every board from the database, broadcast the ones that changed and return them all."""
+        events = []
+        with self._lock:
+            for window in self.windows:
+                board = self.load(self.n, window)
+                if board == self.boards.get(window):
+                    continue
+                self.boards[window] = board
+                self.versions[window] += 1
+                events.append({"window": window, "version": self.versions[window], "size": self.n, "entries": board})
+            self.loaded_at = time.monotonic()
+            boards = {w: list(self.boards[w]) for w in self.windows}
+        if events and self.loop is not None and self.subscribers:
+            self.loop.call_soon_threadsafe(self._fanout, events)
+        return boards
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stale = time.monotonic() - self.loaded_at >= self.reload_sec
+        if stale:
+            self.refresh()
+        with self._lock:
+            return {w: {"version": self.versions[w], "size": self.n, "entries": list(self.boards[w])} for w in self.windows}
+
+    def at_capacity(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    async def stream(self, keepalive_sec: float = 15.0):
+        """
+        SSE body: a snapshot, then one `board` event per changed board.
+
+        The subscriber is registered before the snapshot is taken, so a
+        change racing the snapshot can be delivered twice but never missed;
+        clients ignore boards whose version is not newer than their own.
+        """
+        # Refreshes run in worker threads and hand their events back to this loop
+        self.loop = asyncio.get_running_loop()
+        sub = _Subscriber(self.queue_size)
+        self.subscribers.add(sub)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        try:
+            # Off the loop: a stale snapshot reads the DB
+            yield _sse("snapshot", await asyncio.to_thread(self.snapshot))
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=keepalive_sec)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    yield _sse("dropped", {"reason": "slow consumer"})
+                    return
+                yield _sse("board", event)
+        finally:
+            self.subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "dropped": self.dropped,
+            "versions": dict(self.versions),
+            "loaded_sec_ago": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+        }
+
+    async def _poll(self):
+        """Reconcile with the database while anyone is listening; exits with the last subscriber."""
+        while self.subscribers:
+            await asyncio.sleep(self.reload_sec)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:  # a DB blip must not end the poller; the next round retries
+                print(f"[LEADERBOARD] Board reload failed: {e}")
+
+    def _fanout(self, events: list[dict]):
+        """Runs on the event loop thread."""
+        for sub in list(self.subscribers):
+            for event in events:
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Replace the backlog with the sentinel; the stream ends and the client reconnects
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    sub.queue.put_nowait(None)
+                    self.subscribers.discard(sub)
+                    self.dropped += 1
+                    break
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
@@ -2,30 +2,47 @@
 FIGHT UWU BIRD API - FastAPI application
 """
 
+import hashlib
+import json
 import os
+from contextlib import nullcontext
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+import librosa
 import numpy as np
 from pathlib import Path
 
-from game_manager import GameManager
+from admission import AdmissionController
+from archive import RecordingArchive
+from contour_verifier import ContourVerifier
+from game_manager import GameManager, GameStatus
 from audio_processor import AudioProcessor
 from uwu_detector import UWUDetector
 from pitch_shifter import PitchShifter
+from profiler import Profiler, ProfileSession
+from replay_index import ReplayIndex, grid_offset
+import shared_store
+from upload import MULTIPART_OVERHEAD_BYTES, read_wav_upload
 from config import CONFIG
+from downsample import clamp_budget, lttb_indices
 import leaderboard
+from leaderboard_stream import LeaderboardBroadcaster
 from better_profanity import profanity
 
 app = FastAPI(title="FIGHT UWU BIRD API")
 
 
-def build_plotly_chart(analysis: dict, target_hz: float) -> dict | None:
+def build_plotly_chart(analysis: dict, target_hz: float, max_points: int) -> dict | None:
     """
     Build Plotly-compatible chart data for the merged Hz corridor view.
 
+    Each trace is decimated to at most `max_points` points with LTTB; point
+    selection runs on the semitone values so it matches the log-Hz y-axis.
+
     Returns a dict with "data" (list of traces) and "layout", ready to be
     passed directly to ContentFrame as chartData / chartLayout.
     Returns None if the intermediate contour data is unavailable (e.g. the
@@ -48,9 +65,14 @@ def build_plotly_chart(analysis: dict, target_hz: float) -> dict | None:
     lower_hz = min_hz * 2.0 ** ((template_arr - dtw_band) / 12.0)
     user_hz = user_median_hz * 2.0 ** (user_arr / 12.0)
 
+    # Both corridor edges follow the template shape, so one index set serves both
+    edge_idx = lttb_indices(t, template_arr, max_points // 2)
+    user_idx = lttb_indices(t, user_arr, max_points)
+
     # Closed polygon for the green fill corridor (toself trace)
-    x_fill = np.concatenate([t, t[::-1]]).tolist()
-    y_fill = np.concatenate([upper_hz, lower_hz[::-1]]).tolist()
+    t_edge = t[edge_idx]
+    x_fill = np.concatenate([t_edge, t_edge[::-1]]).tolist()
+    y_fill = np.concatenate([upper_hz[edge_idx], lower_hz[edge_idx][::-1]]).tolist()
 
     return {
         "data": [
@@ -65,8 +87,8 @@ def build_plotly_chart(analysis: dict, target_hz: float) -> dict | None:
                 "hoverinfo": "none",
             },
             {
-                "x": t.tolist(),
-                "y": user_hz.tolist(),
+                "x": t[user_idx].tolist(),
+                "y": user_hz[user_idx].tolist(),
                 "type": "scatter",
                 "mode": "lines",
                 "line": {"color": "#e74c3c", "width": 2},
@@ -122,13 +144,64 @@ app.add_middleware(
 ASSETS_DIR = Path("assets")
 game_manager = GameManager()
 audio_processor = AudioProcessor(sr=CONFIG["sample_rate"])
+admission = AdmissionController(CONFIG)
+profiler = Profiler(CONFIG)
+contour_verifier = ContourVerifier(audio_processor, CONFIG)
+recording_archive = RecordingArchive(CONFIG["archive_dir"]) if CONFIG["archive_dir"] else None
+replay_index = ReplayIndex(CONFIG)
+leaderboard_boards = LeaderboardBroadcaster(leaderboard.WINDOWS, leaderboard.get_top, CONFIG)
+
+
+def _shared_assets_key(base_audio_path: Path) -> str:
+    """Changes whenever anything the shared assets are derived from changes."""
+    h = hashlib.sha256(base_audio_path.read_bytes())
+    h.update(json.dumps([
+        CONFIG["round_shifts"],
+        CONFIG["preroll_silence_sec"],
+        CONFIG["min_voiced_ratio"],
+        audio_processor.extraction_key(),
+        librosa.__version__,
+    ]).encode())
+    return h.hexdigest()[:16]
+
+
+def _write_asset_files(shifter: PitchShifter, template: np.ndarray, rebuilt: bool):
+    """
+    Write the files derived from the shared assets: the round WAVs served by
+    /bird-call and the template used by rescore.py. All of them after a
+    rebuild, otherwise only missing ones — a store can outlive its files
+    (fresh checkout, cleaned assets dir), so this runs on every start.
+    """
+    round_files = [ASSETS_DIR / f"uwu_round_{i + 1}.wav" for i in range(len(CONFIG["round_shifts"]))]
+    if rebuilt or not all(f.exists() for f in round_files):
+        shifter.pregenerate(CONFIG["round_shifts"], str(ASSETS_DIR), CONFIG["preroll_silence_sec"])
+        print(f"[OK] Wrote {len(round_files)} round WAVs from the shared assets")
+    template_file = ASSETS_DIR / "uwu_template.npy"
+    if rebuilt or not template_file.exists():
+        with shared_store.atomic_write(template_file) as fh:
+            np.save(fh, template)
+
+
+def _build_shared_assets(base_audio_path: Path) -> tuple[dict, dict]:
+    """Decode and pitch-shift the base call and extract its template (once per deploy, not per worker)."""
+    # 1. Process base audio
+    shifter = PitchShifter(str(base_audio_path))
+    for s in CONFIG["round_shifts"]:
+        shifter.get_shifted(s)
+
+    # 2. Extract template contour from base
+    contour_data = audio_processor.extract_contour(shifter.y_base)
+    template = contour_data["contour_semitones"]
+
+    arrays = {"y_base": shifter.y_base, "template": template}
+    arrays.update({f"shift_{s}": shifter.get_shifted(s) for s in CONFIG["round_shifts"]})
+    return arrays, {"base_pitch_hz": contour_data["median_hz"], "sr": shifter.sr}
 
 
 @app.on_event("startup")
 def startup():
-    global pitch_shifter, uwu_detector
+    global pitch_shifter, uwu_detector, shared_assets
 
-    # 1. Process base audio
     base_audio_path = ASSETS_DIR / "uwu_sound_1.mp3"
     if not base_audio_path.exists():
         raise FileNotFoundError(
@@ -136,25 +209,45 @@ def startup():
             "Please ensure uwu_sound_1.mp3 exists in the assets directory."
         )
 
-    pitch_shifter = PitchShifter(str(base_audio_path))
-    pitch_shifter.pregenerate(CONFIG["round_shifts"], str(ASSETS_DIR), CONFIG["preroll_silence_sec"])
-
-    # 2. Extract template contour from base
-    contour_data = audio_processor.extract_contour(pitch_shifter.y_base)
-    template = contour_data["contour_semitones"]
-    np.save(str(ASSETS_DIR / "uwu_template.npy"), template)
+    # Built by whichever worker starts first; the rest map the same file read-only
+    shared_assets, built = shared_store.load_or_build(
+        ASSETS_DIR / ".shared-assets.bin",
+        _shared_assets_key(base_audio_path),
+        lambda: _build_shared_assets(base_audio_path),
+    )
+    pitch_shifter = PitchShifter.from_arrays(
+        shared_assets["y_base"],
+        {s: shared_assets[f"shift_{s}"] for s in CONFIG["round_shifts"]},
+        sr=shared_assets.meta["sr"],
+    )
+    _write_asset_files(pitch_shifter, shared_assets["template"], built)
 
     # 3. Store base pitch
-    CONFIG["base_pitch_hz"] = contour_data["median_hz"]
+    CONFIG["base_pitch_hz"] = shared_assets.meta["base_pitch_hz"]
 
     # 4. Initialize detector
-    uwu_detector = UWUDetector(template, CONFIG)
+    uwu_detector = UWUDetector(shared_assets["template"], CONFIG)
 
     # 5. Initialize leaderboard
     leaderboard.init_db()
 
+    # 6. Restore replay fingerprints from the last snapshot, if configured
+    if replay_index.load():
+        print(f"[OK] Loaded {len(replay_index)} replay fingerprints from {replay_index.snapshot_path}")
+
     print(f"[OK] Loaded base call. Median pitch: {CONFIG['base_pitch_hz']:.1f} Hz")
-    print(f"[OK] Pre-generated {len(CONFIG['round_shifts'])} pitch variants")
+    print(f"[OK] Attached shared assets ({shared_assets.nbytes() / 1024:.0f} KB, key {shared_assets.key})")
+
+
+@app.on_event("startup")
+async def start_replay_sync():
+    # Async, so the sync task is created on the server's event loop
+    replay_index.start_sync()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    replay_index.save()
 
 
 # --- Routes ---
@@ -200,6 +293,25 @@ def health():
     return {"status": "ok", "base_pitch_hz": CONFIG["base_pitch_hz"]}
 
 
+def _require_admin(token: str | None):
+    if not profiler.admin_token:
+        raise HTTPException(404, "Not found")
+    if not profiler.is_admin(token):
+        raise HTTPException(403, "Invalid admin token")
+
+
+@app.get("/api/admission/stats")
+def admission_stats(x_admin_token: str | None = Header(None)):
+    _require_admin(x_admin_token)
+    return admission.stats()
+
+
+@app.get("/api/replay/stats")
+def replay_stats(x_admin_token: str | None = Header(None)):
+    _require_admin(x_admin_token)
+    return replay_index.stats()
+
+
 @app.post("/api/game/start")
 def start_game():
     session = game_manager.create_session()
@@ -239,49 +351,222 @@ def get_bird_call(session_id: str):
     )
 
 
+def _client_ip(request: Request) -> str:
+    # Each trusted proxy appends the address it received the request from, so
+    # the client is `hops` entries from the right; leftmost entries are whatever
+    # the client chose to send.
+    hops = CONFIG["trusted_proxy_hops"]
+    if hops > 0:
+        forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
 @app.post("/api/game/{session_id}/analyze")
-async def analyze_player_audio(session_id: str, audio: UploadFile = File(...), include_chart: bool = False):
+async def analyze_player_audio(
+    session_id: str,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    include_chart: bool = False,
+    max_points: int | None = None,
+):
     session = game_manager.get_session(session_id)
     if not session:
         raise HTTPException(404, "Session not found")
 
-    if session.status.value in ("game_won", "game_lost"):
+    # Reject on session state before touching the request body
+    if session.status in (GameStatus.GAME_WON, GameStatus.GAME_LOST):
+        admission.record("rejected_game_over")
         raise HTTPException(400, "Game already over")
+    if session.status != GameStatus.WAITING_FOR_PLAYER:
+        admission.record("rejected_session_busy")
+        raise HTTPException(409, "Analysis already in progress for this session")
 
-    # Read and process audio
-    MAX_AUDIO_BYTES = 5 * 1024 * 1024  # 5 MB (a 3s mono WAV at 44100 Hz is ~265 KB)
-    audio_bytes = await audio.read()
-    if len(audio_bytes) < 1000:
-        raise HTTPException(400, "Audio file too small")
-    if len(audio_bytes) > MAX_AUDIO_BYTES:
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > CONFIG["max_audio_bytes"] + MULTIPART_OVERHEAD_BYTES:
+        admission.record("rejected_too_large")
         raise HTTPException(413, "Audio file too large")
 
-    y = audio_processor.load_audio(audio_bytes)
-    contour_data = audio_processor.extract_contour(y)
+    decision = admission.admit(_client_ip(request), session_id)
+    if not decision.allowed:
+        raise HTTPException(
+            decision.status_code,
+            decision.reason,
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+
+    session.status = GameStatus.ANALYZING
+    prof = profiler.maybe_start("analyze", request.headers)
+    try:
+        return await _analyze_admitted(
+            session, request, background_tasks, include_chart, clamp_budget(max_points, CONFIG), prof
+        )
+    finally:
+        if prof is not None:
+            response.headers["X-Profile-Id"] = profiler.finish(prof)
+        # Any error before advance_round leaves the round open for a retry
+        if session.status == GameStatus.ANALYZING:
+            session.status = GameStatus.WAITING_FOR_PLAYER
+
+
+def _no_phase(name: str):
+    return nullcontext()
+
+
+def _run_analysis(
+    samples: np.ndarray,
+    sample_rate: int,
+    fields: dict,
+    target_hz: float,
+    include_chart: bool,
+    max_points: int,
+    prof: ProfileSession | None = None,
+):
+    """
+    CPU-bound part of analysis: decode, pitch tracking, DTW, chart.
+
+    If the client sent its own f0 track, it is scored first. A losing track
+    is used as-is once it agrees with the audio (ContourVerifier.verify); a
+    winning one is checked against a pyin track of the whole recording
+    (ContourVerifier.compare) and the round is scored from pyin, which a win
+    needs anyway. A track that contradicts the audio fails the round, and one
+    that cannot be checked falls back to server tracking. The mode used is
+    reported in analysis["analysis_mode"].
+
+    Also returns `server_f0`, the pyin track of the recording whenever one was
+    computed — always for a win, so the replay index and the archive only ever
+    see server-side pitch — and `server_rms`, its frame RMS for the replay index. Tracking starts from the call's onset
+    (replay_index.grid_offset), so padding a replayed WAV does not change its frames.
+    """
+    phase = prof.phase if prof is not None else _no_phase
+    with prof.track() if prof is not None else nullcontext():
+        with phase("decode"):
+            y = audio_processor.load_pcm(samples, sample_rate)
+            offset = grid_offset(y, audio_processor.hop_length)
+            y = y[offset:]
+
+        contour_data = None
+        server_f0 = None
+        mode = "server"
+        client_contour = contour_verifier.parse(fields, len(y), offset)
+        if client_contour is not None:
+            client_data = audio_processor.contour_from_f0(client_contour[0])
+            with phase("dtw"):
+                analysis = uwu_detector.analyze(client_data, target_hz)
+            if analysis["passed"]:
+                with phase("pitch"):
+                    server_f0 = audio_processor.track_f0(y)
+                check = contour_verifier.compare(len(y), server_f0, *client_contour)
+            else:
+                with phase("verify"):
+                    check = contour_verifier.verify(y, *client_contour)
+            if check["ok"]:
+                mode = "client_verified"
+                if server_f0 is None:
+                    contour_data = client_data
+            else:
+                print(f"[VERIFY] Client contour rejected ({check['reason']}): {check['overall']} {check['windows']}")
+                mode = "client_rejected" if check["tampered"] else "server_fallback"
+        if contour_data is None:
+            if server_f0 is None:
+                with phase("pitch"):
+                    server_f0 = audio_processor.track_f0(y)
+            contour_data = audio_processor.contour_from_f0(server_f0)
+            with phase("dtw"):
+                analysis = uwu_detector.analyze(contour_data, target_hz)
+
+        if mode == "client_rejected":
+            # The round is scored from the server track (for the chart) but cannot be won
+            analysis.update(passed=False, performance_score=0, failure_reason="Pitch data didn't match your recording.")
+        with phase("chart"):
+            pitch_chart = build_plotly_chart(analysis, target_hz, max_points) if include_chart else None
+        server_rms = audio_processor.frame_rms(y) if server_f0 is not None else None
+    analysis["analysis_mode"] = mode
+    return contour_data, server_f0, server_rms, analysis, pitch_chart
+
+
+async def _analyze_admitted(
+    session,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    include_chart: bool,
+    max_points: int,
+    prof: ProfileSession | None = None,
+) -> dict:
+    session_id = session.session_id
+    phase = prof.phase if prof is not None else _no_phase
+
+    # Stream the upload straight into a PCM buffer (size cap enforced while reading)
+    with phase("upload"):
+        samples, sample_rate, fields = await read_wav_upload(
+            request, "audio", CONFIG["max_audio_bytes"], text_fields=("f0", "f0_hop_sec", "f0_start_sec")
+        )
 
     # Calculate target pitch for this round
     round_idx = session.current_round - 1
     shift = CONFIG["round_shifts"][round_idx]
     target_hz = CONFIG["base_pitch_hz"] * (2 ** (shift / 12.0))
 
-    # Run detection
-    analysis = uwu_detector.analyze(contour_data, target_hz)
-    pitch_chart = build_plotly_chart(analysis, target_hz) if include_chart else None
-
-    # Load template for visualization
-    template = np.load(str(ASSETS_DIR / "uwu_template.npy"))
+    # Run detection off the event loop so other requests keep being served.
+    # The in-flight slot covers only this CPU-bound part, not the upload above.
+    decision = admission.try_acquire_slot()
+    if not decision.allowed:
+        raise HTTPException(
+            decision.status_code,
+            decision.reason,
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+    try:
+        contour_data, server_f0, server_rms, analysis, pitch_chart = await run_in_threadpool(
+            _run_analysis, samples, sample_rate, fields, target_hz, include_chart, max_points, prof
+        )
+    finally:
+        admission.release()
+
+    # Winning recordings are checked against earlier wins to catch bots replaying one WAV
+    if analysis["passed"]:
+        with phase("replay"):
+            replay_match = await run_in_threadpool(replay_index.check_and_add, server_f0, server_rms)
+        if replay_match is not None:
+            session.replay_suspected = True
+            print(f"[REPLAY] Session {session_id[:8]} round {session.current_round} matches an earlier win: {replay_match}")
+        if replay_index.snapshot_due():
+            background_tasks.add_task(replay_index.save)
+
+    # Archive for offline re-scoring (rescore.py) after the response is sent.
+    # The audio is kept as uploaded; a client track is stored under its own
+    # key, so rescore.py re-tracks it with pyin.
+    if recording_archive is not None:
+        background_tasks.add_task(
+            recording_archive.save,
+            samples,
+            sample_rate,
+            server_f0 if server_f0 is not None else contour_data["f0"],
+            audio_processor.extraction_key() if server_f0 is not None else "client",
+            {
+                "session_id": session_id,
+                "round": session.current_round,
+                "shift": shift,
+                "target_hz": target_hz,
+                "passed": analysis["passed"],
+                "performance_score": analysis["performance_score"],
+            },
+        )
 
     # Prepare pitch contours for visualization (downsample for smaller payload)
     player_contour = contour_data["contour_semitones"]
-    template_contour = template
+    template_contour = uwu_detector.template
 
-    # Downsample by factor of 4 to reduce data size
-    downsample_factor = 4
-    player_contour_downsampled = player_contour[::downsample_factor].tolist()
-    template_contour_downsampled = template_contour[::downsample_factor].tolist()
-
-    # Create time array (in frames, then we'll convert to seconds on frontend)
-    time_frames = list(range(0, len(player_contour_downsampled)))
+    # Shape-preserving decimation; x values stay in original frame indices
+    # (converted to seconds on the frontend)
+    player_frames = lttb_indices(np.arange(len(player_contour)), player_contour, max_points)
+    template_frames = lttb_indices(np.arange(len(template_contour)), template_contour, max_points)
+    player_contour_downsampled = player_contour[player_frames].tolist()
+    template_contour_downsampled = template_contour[template_frames].tolist()
+    time_frames = player_frames.tolist()
+    template_time_frames = template_frames.tolist()
 
     # Store this round's contours in the session for persistence
     session.round_contours.append({
@@ -289,6 +574,7 @@ async def analyze_player_audio(session_id: str, audio: UploadFile = File(...), i
         "player_contour": player_contour_downsampled,
         "template_contour": template_contour_downsampled,
         "time_frames": time_frames,
+        "template_time_frames": template_time_frames,
         "target_pitch_hz": target_hz,
         "player_median_pitch_hz": float(analysis["player_median_hz"]),
         "shift": CONFIG["round_shifts"][round_idx],
@@ -328,6 +614,8 @@ async def analyze_player_audio(session_id: str, audio: UploadFile = File(...), i
         "passed": bool(analysis["passed"]),
         "performance_score": int(analysis["performance_score"]),
         "failure_reason": analysis.get("failure_reason"),
+        "analysis_mode": analysis["analysis_mode"],
+        "replay_suspected": session.replay_suspected,
         "next_round": next_round if next_round is None else int(next_round),
         "game_over": bool(result is not None),
         "result": result,
@@ -340,7 +628,8 @@ async def analyze_player_audio(session_id: str, audio: UploadFile = File(...), i
         "pitch_visualization": {
             "player_contour": [float(x) for x in player_contour_downsampled],
             "template_contour": [float(x) for x in template_contour_downsampled],
-            "time_frames": [int(x) for x in time_frames],
+            "time_frames": time_frames,
+            "template_time_frames": template_time_frames,
             "target_pitch_hz": float(target_hz),
             "player_median_pitch_hz": float(analysis["player_median_hz"]),
             "pitch_tolerance_semitones": float(CONFIG["pitch_tolerance"]),
@@ -350,6 +639,31 @@ async def analyze_player_audio(session_id: str, audio: UploadFile = File(...), i
     }
 
 
+# --- Admin: profiling ---
+
+@app.post("/api/admin/profile")
+def arm_profiler(count: int = 1, x_admin_token: str | None = Header(None)):
+    """Profile the next `count` analyze requests (0 disarms)."""
+    _require_admin(x_admin_token)
+    return {"armed": profiler.arm(min(count, CONFIG["profile_max_files"]))}
+
+
+@app.get("/api/admin/profiles")
+def list_profiles(x_admin_token: str | None = Header(None)):
+    _require_admin(x_admin_token)
+    return {"armed": profiler.armed, "profiles": profiler.list_profiles()}
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+def download_profile(profile_id: str, fmt: str = "speedscope", x_admin_token: str | None = Header(None)):
+    _require_admin(x_admin_token)
+    path = profiler.path_for(profile_id, fmt)
+    if path is None:
+        raise HTTPException(404, "Profile not found")
+    media_type = "application/json" if fmt == "speedscope" else "text/plain"
+    return FileResponse(str(path), media_type=media_type, filename=path.name)
+
+
 # --- Leaderboard ---
 
 class LeaderboardSubmission(BaseModel):
@@ -359,13 +673,43 @@ class LeaderboardSubmission(BaseModel):
     token: str
 
 
+def _check_window(window: str):
+    if window not in leaderboard.WINDOWS:
+        raise HTTPException(400, f"window must be one of {', '.join(leaderboard.WINDOWS)}")
+
+
 @app.get("/api/leaderboard")
-def get_leaderboard():
-    return {"entries": leaderboard.get_top(8)}
+def get_leaderboard(window: str = "all"):
+    _check_window(window)
+    return {"window": window, "entries": leaderboard.get_top(CONFIG["leaderboard_size"], window)}
+
+
+@app.get("/api/leaderboard/stream")
+async def stream_leaderboard():
+    """
+    Server-sent events: one `snapshot` event with every window's board, then
+    a `board` event ({window, version, size, entries}) whenever one changes.
+    A `dropped` event means the client fell behind; reconnect for a fresh snapshot.
+    """
+    if leaderboard_boards.at_capacity():
+        raise HTTPException(503, "Too many leaderboard subscribers", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        leaderboard_boards.stream(CONFIG["leaderboard_stream_keepalive_sec"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/leaderboard/stats")
+def leaderboard_stats(x_admin_token: str | None = Header(None)):
+    _require_admin(x_admin_token)
+    return leaderboard_boards.stats()
 
 
 @app.post("/api/leaderboard")
-def post_leaderboard(body: LeaderboardSubmission):
+def post_leaderboard(body: LeaderboardSubmission, window: str = "all"):
+    _check_window(window)
+
     # Verify score token
     if not GameManager.verify_token(body.session_id, body.score, body.token):
         raise HTTPException(403, "Invalid score token")
@@ -376,6 +720,13 @@ def post_leaderboard(body: LeaderboardSubmission):
     if profanity.contains_profanity(clean_name):
         raise HTTPException(400, "Name contains inappropriate language")
 
-    leaderboard.insert_entry(clean_name, body.score)
-    rank = leaderboard.get_rank(clean_name, body.score)
-    return {"entries": leaderboard.get_top(8), "player_rank": rank}
+    entry_id = leaderboard.insert_entry(clean_name, body.score)
+    # Reloads from the DB, so subscribers are pushed any board the entry changed
+    boards = leaderboard_boards.refresh()
+    ranks = leaderboard.get_ranks(entry_id)
+    return {
+        "window": window,
+        "entries": boards[window],
+        "player_rank": ranks[window],
+        "ranks": ranks,
+    }
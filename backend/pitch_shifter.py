@@ -7,6 +7,8 @@ import librosa
 import soundfile as sf
 from pathlib import Path
 
+from shared_store import atomic_write
+
 
 class PitchShifter:
     """Generates and caches pitch-shifted audio variants"""
@@ -17,6 +19,15 @@ class PitchShifter:
         self.y_base = librosa.util.normalize(self.y_base)
         self.cache: dict[int, np.ndarray] = {}
 
+    @classmethod
+    def from_arrays(cls, y_base: np.ndarray, variants: dict[int, np.ndarray], sr: int = 44100) -> "PitchShifter":
+        """Wrap already-processed audio (e.g. views into a SharedArrays store) without decoding or shifting."""
+        shifter = cls.__new__(cls)
+        shifter.sr = sr
+        shifter.y_base = y_base
+        shifter.cache = dict(variants)
+        return shifter
+
     def get_shifted(self, semitones: int) -> np.ndarray:
         """Return pitch-shifted audio, cached."""
         if semitones not in self.cache:
@@ -42,8 +53,13 @@ class PitchShifter:
         for idx, s in enumerate(shifts):
             y = self.get_shifted(s)
             y_padded = np.concatenate([preroll, y]) if preroll_silence_sec > 0 else y
-            filepath = output_path / f"uwu_round_{idx + 1}.wav"
-            sf.write(str(filepath), y_padded, self.sr)
+            _write_wav(output_path / f"uwu_round_{idx + 1}.wav", y_padded, self.sr)
 
         # Also save the processed base (no preroll — used for analysis only)
-        sf.write(str(output_path / "uwu_base.wav"), self.y_base, self.sr)
+        _write_wav(output_path / "uwu_base.wav", self.y_base, self.sr)
+
+
+def _write_wav(path: Path, y: np.ndarray, sr: int):
+    """Write via atomic_write, so a file being served is never half-written."""
+    with atomic_write(path) as fh:
+        sf.write(fh, y, sr, format="WAV")
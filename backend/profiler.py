@@ -0,0 +1,209 @@
+"""
+On-demand sampling profiler for live analyze requests
+"""
+
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+class ProfileSession:
+    """
+    Samples the Python stacks of the threads registered via `track()`.
+
+    A daemon thread wakes every `interval_sec`, reads `sys._current_frames()`
+    and charges each tracked thread's stack with the wall time since the
+    previous sample. Weighting by elapsed time (rather than counting samples)
+    keeps totals honest when long GIL-holding calls in numba/numpy delay the
+    sampler. No tracing hooks are installed, so the profiled code runs at
+    full speed between samples.
+    """
+
+    def __init__(self, label: str, interval_sec: float):
+        self.label = label
+        self.interval_sec = interval_sec
+        self.stacks: Counter = Counter()  # stack → seconds
+        self.timings: dict[str, float] = {}
+        self._tracked: set[int] = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._started_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self._started_at
+
+    @contextmanager
+    def track(self):
+        """Sample the calling thread for the duration of the block."""
+        tid = threading.get_ident()
+        self._tracked.add(tid)
+        try:
+            yield
+        finally:
+            self._tracked.discard(tid)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record wall time of a named phase alongside the samples (summed if it runs twice)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000, 2)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_sec):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            tracked = tuple(self._tracked)
+            if not tracked:
+                continue
+            frames = sys._current_frames()
+            for tid in tracked:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += elapsed
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format; weights are in microseconds."""
+        lines = []
+        for stack, seconds in self.stacks.most_common():
+            names = ";".join(f"{name} ({Path(file).name}:{line})" for name, file, line in stack)
+            lines.append(f"{names} {max(1, round(seconds * 1e6))}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, duration_sec: float) -> dict:
+        """Speedscope 'sampled' profile; weights are in milliseconds."""
+        frame_index: dict[tuple, int] = {}
+        frames, samples, weights = [], [], []
+        for stack, seconds in self.stacks.items():
+            sample = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                sample.append(frame_index[key])
+            samples.append(sample)
+            weights.append(round(seconds * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "fight-uwu-bird",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.label,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(duration_sec * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "metadata": {"phase_ms": self.timings},
+        }
+
+
+class Profiler:
+    """
+    Decides which requests get profiled and keeps a bounded ring of results on disk.
+
+    Profiling is armed either per request (admin token + `X-Profile: 1` header)
+    or for the next N requests via `arm()`. When neither applies,
+    `maybe_start()` returns None after a header lookup and an int compare.
+    """
+
+    def __init__(self, config: dict):
+        self.admin_token = os.environ.get("ADMIN_TOKEN") or None
+        self.output_dir = Path(config["profile_dir"])
+        self.max_files = config["profile_max_files"]
+        self.interval_sec = config["profile_interval_ms"] / 1000.0
+        self.armed = 0
+        self._lock = threading.Lock()
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(self.admin_token, token)
+
+    def arm(self, count: int) -> int:
+        with self._lock:
+            self.armed = max(0, count)
+            return self.armed
+
+    def maybe_start(self, label: str, headers) -> Optional[ProfileSession]:
+        if self.armed <= 0 and "x-profile" not in headers:
+            return None
+
+        wanted = False
+        if headers.get("x-profile") == "1" and self.is_admin(headers.get("x-admin-token")):
+            wanted = True
+        else:
+            with self._lock:
+                if self.armed > 0:
+                    self.armed -= 1
+                    wanted = True
+        if not wanted:
+            return None
+
+        session = ProfileSession(label, self.interval_sec)
+        session.start()
+        return session
+
+    def finish(self, session: ProfileSession) -> str:
+        """Stop sampling, write both output formats and trim the ring. Returns the profile id."""
+        duration = session.stop()
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{session.label}"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / f"{profile_id}.speedscope.json").write_text(
+            json.dumps(session.speedscope(duration))
+        )
+        (self.output_dir / f"{profile_id}.collapsed.txt").write_text(session.collapsed())
+        self._trim()
+        return profile_id
+
+    def list_profiles(self) -> list[dict]:
+        if not self.output_dir.exists():
+            return []
+        files = sorted(self.output_dir.glob("*.speedscope.json"), reverse=True)
+        return [
+            {
+                "id": f.name.removesuffix(".speedscope.json"),
+                "size_bytes": f.stat().st_size,
+            }
+            for f in files
+        ]
+
+    def path_for(self, profile_id: str, fmt: str) -> Optional[Path]:
+        suffix = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}.get(fmt)
+        if suffix is None or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+            return None
+        path = self.output_dir / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def _trim(self):
+        profiles = sorted(self.output_dir.glob("*.speedscope.json"))
+        for old in profiles[: max(0, len(profiles) - self.max_files)]:
+            profile_id = old.name.removesuffix(".speedscope.json")
+            old.unlink(missing_ok=True)
+            (self.output_dir / f"{profile_id}.collapsed.txt").unlink(missing_ok=True)
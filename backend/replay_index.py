@@ -0,0 +1,483 @@
+"""
+Replay detection: MinHash fingerprints of winning contours in a bounded LSH index.
+
+A bot that replays one winning WAV into fresh sessions produces the same (or,
+after re-encoding / added noise, nearly the same) pyin track every time,
+while two honest attempts at the call share few fine-grained pitch shapes.
+Each winning f0 track is reduced to a 64-byte b-bit MinHash signature; an
+LSH index over those signatures finds near-duplicates without comparing
+against every stored recording.
+
+Leading padding would move pyin's frame grid under the call, so recordings
+are tracked on a grid anchored at the call's onset (grid_offset) and the
+fingerprint covers every decimation phase: any pad then shifts the track by
+whole frames, which leaves the fingerprint unchanged.
+
+Added noise changes pyin's output almost only in the quiet frames around the
+call (the body tracks frame-for-frame the same down to about -45 dBFS of
+noise), so those frames are left out. Small f0 changes in what remains only
+matter where a delta sits near a quantization bin edge; each shingle is
+quantized on whichever of several offset grids keeps its deltas farthest from
+an edge. Re-synthesized copies (time-stretched or pitch-shifted by a vocoder)
+change the fine pitch shapes themselves and are not caught.
+
+Benchmark (index lookup latency and memory):
+
+    python replay_index.py --bench 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from shared_store import atomic_write, file_lock
+
+# Fingerprint parameters. Changing any of them changes FINGERPRINT_KEY, and
+# snapshots written under a different key are ignored on load.
+_DECIMATE = 3        # Frames averaged before differencing (absorbs sub-hop jitter)
+_STEP_ST = 0.5       # Quantization step for pitch deltas, in semitones
+_SHINGLE = 4         # Consecutive quantized deltas per shingle
+_GRIDS = 3           # Quantization grids, offset by 1/_GRIDS of a step
+_QUIET_DB = 15       # Frames this far below the loudest one are left out
+_MIN_SHINGLES = 8    # Fewer voiced shingles than this = no fingerprint
+_ONSET_WINDOW = 256  # Samples per RMS envelope step when locating the onset
+_ONSET_LEVEL = 0.5   # Onset = first envelope value at this fraction of the peak
+N_HASHES = 64        # One byte of signature per hash
+BANDS = 16           # LSH bands of N_HASHES // BANDS = 4 rows each
+FINGERPRINT_KEY = f"v3-d{_DECIMATE}-q{_STEP_ST}-k{_SHINGLE}-g{_GRIDS}-l{_QUIET_DB}-h{N_HASHES}-b{BANDS}"
+
+_rng = np.random.default_rng(0x5EED_0ADE)
+_HASH_A = _rng.integers(1, 2**63, size=N_HASHES, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, size=N_HASHES, dtype=np.uint64)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads structured shingle codes over all 64 bits."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def grid_offset(y: np.ndarray, hop_length: int) -> int:
+    """
+    Leading samples to drop so a hop boundary falls on the call's onset.
+
+    The onset is where the RMS envelope first reaches half its peak — steep
+    enough there that added noise moves it by a few samples at most. Tracking
+    y[grid_offset(y, hop):] puts a padded copy of a recording on the same
+    frames as the original, a whole number of hops later. Always < hop_length.
+    """
+    power = np.cumsum(np.asarray(y, dtype=np.float64) ** 2)
+    if len(power) <= _ONSET_WINDOW:
+        return 0
+    envelope = power[_ONSET_WINDOW:] - power[:-_ONSET_WINDOW]
+    onset = int(np.argmax(envelope >= envelope.max() * _ONSET_LEVEL**2))
+    return onset % hop_length
+
+
+def fingerprint(f0: np.ndarray, frame_rms: np.ndarray | None = None) -> np.ndarray | None:
+    """
+    64-byte b-bit MinHash signature of an f0 track (AudioProcessor.extract_contour
+    output, NaN = unvoiced), or None if it has too little voiced pitch.
+
+    Shingles are runs of quantized frame-to-frame pitch changes in semitones.
+    Unlike the median-relative contour_semitones they do not move when a few
+    edge frames flip voicing and shift the median, and they ignore the key.
+    Shingles from every decimation phase go into one set, so the same
+    recording starting a frame later (leading padding) yields the same set.
+    Each shingle is quantized on the grid where its closest delta is farthest
+    from a bin edge, so jitter smaller than that margin leaves it unchanged.
+
+    `frame_rms` (AudioProcessor.frame_rms, same frames as f0) drops the quiet
+    frames, where added noise changes pyin's output first.
+    """
+    semitones = 12 * np.log2(np.asarray(f0, dtype=np.float64))
+    if frame_rms is not None:
+        n = min(len(semitones), len(frame_rms))
+        semitones[:n][frame_rms[:n] < np.max(frame_rms) * 10 ** (-_QUIET_DB / 20)] = np.nan
+    grids = np.arange(_GRIDS)[:, None, None] / _GRIDS
+    codes = []
+    for phase in range(_DECIMATE):
+        n = (len(semitones) - phase) // _DECIMATE * _DECIMATE
+        deltas = np.diff(semitones[phase : phase + n].reshape(-1, _DECIMATE).mean(axis=1))  # NaN if any frame is unvoiced
+        if len(deltas) < _SHINGLE:
+            continue
+        voiced_windows = np.lib.stride_tricks.sliding_window_view(~np.isnan(deltas), _SHINGLE).all(axis=1)
+        windows = np.lib.stride_tricks.sliding_window_view(np.nan_to_num(deltas) / _STEP_ST, _SHINGLE)[voiced_windows]
+        shifted = windows + grids  # (_GRIDS, shingles, _SHINGLE)
+        q = np.floor(shifted)
+        margin = np.minimum(shifted - q, q + 1 - shifted).min(axis=2)
+        grid = margin.argmax(axis=0)
+        q = q[grid, np.arange(len(grid))].astype(np.int64)
+        code = grid.astype(np.uint64) + np.uint64(1)
+        for j in range(_SHINGLE):
+            code = code * np.uint64(1000003) + (q[:, j] & 0xFFFF).astype(np.uint64)
+        codes.append(code)
+    if not codes:
+        return None
+    shingles = np.unique(np.concatenate(codes))
+    if len(shingles) < _MIN_SHINGLES:
+        return None
+
+    hashes = (_mix64(shingles)[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+    return (hashes.min(axis=0) & np.uint64(0xFF)).astype(np.uint8)
+
+
+def similarity(sig: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of `sig` to each row of `others` (b-bit corrected)."""
+    agree = (others == sig).mean(axis=-1)
+    return np.clip((agree - 1 / 256) / (1 - 1 / 256), 0.0, 1.0)
+
+
+def _row_keys(sigs: np.ndarray) -> np.ndarray:
+    """(n, N_HASHES) uint8 signatures -> (n,) uint64 keys, for set operations on whole signatures."""
+    words = np.ascontiguousarray(sigs).view(np.uint64)
+    keys = np.zeros(len(words), dtype=np.uint64)
+    for j in range(words.shape[1]):
+        keys = (keys ^ words[:, j]) * _GOLDEN
+    return keys
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """(..., N_HASHES) uint8 signatures -> (..., BANDS) uint32 band keys."""
+    bands = np.ascontiguousarray(sigs).view(np.uint32).astype(np.uint64)  # 4 one-byte rows per band
+    return ((bands * _GOLDEN) >> np.uint64(32)).astype(np.uint32)
+
+
+class ReplayIndex:
+    """
+    The most recent `capacity` distinct winning fingerprints, with per-band
+    sorted key arrays for LSH lookups.
+
+    Signatures live in a fixed ring (the oldest is overwritten once full).
+    New entries are matched by a linear scan of a small pending buffer until
+    `merge_every` of them have accumulated; they are then merged into the
+    sorted arrays, so inserts stay cheap and lookups are a few binary
+    searches plus a comparison against the handful of candidates they yield.
+    Memory is ~197 bytes per entry (64 signature + 128 index + 5 bookkeeping).
+
+    With a snapshot file, workers share entries through it: every `sync_sec`
+    each saves its new fingerprints and adds the ones other workers saved to
+    its own index (refresh), so a replay sent to a different worker than the
+    original is still caught.
+    """
+
+    def __init__(self, config: dict, merge_every: int = 2048):
+        self.capacity = config["replay_index_capacity"]
+        self.threshold = config["replay_similarity_threshold"]
+        self.snapshot_path = Path(config["replay_index_path"]) if config["replay_index_path"] else None
+        self.snapshot_every = config["replay_snapshot_every"]
+        self.sync_sec = config["replay_sync_sec"]
+        self.merge_every = merge_every
+
+        self.sigs = np.zeros((self.capacity, N_HASHES), dtype=np.uint8)
+        self.added_at = np.zeros(self.capacity, dtype=np.uint32)  # unix seconds
+        self.inserted = 0  # total ever; next slot is inserted % capacity
+        self.keys = np.zeros((BANDS, 0), dtype=np.uint32)
+        self.slots = np.zeros((BANDS, 0), dtype=np.int32)
+        self.pending: list[int] = []
+        self.overwritten = np.zeros(self.capacity, dtype=bool)  # slots reused since the last merge
+        self.stats_counters = {"checked": 0, "flagged": 0, "no_fingerprint": 0}
+        self._since_snapshot = 0
+        self._snapshot_mtime = None  # st_mtime_ns of the snapshot last read
+        self._syncer: asyncio.Task | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.inserted, self.capacity)
+
+    def check_and_add(self, f0: np.ndarray, frame_rms: np.ndarray | None = None) -> dict | None:
+        """
+        Fingerprint a winning f0 track (with its frame RMS, see fingerprint)
+        and look it up. Returns match details if it is a near-duplicate of a
+        stored recording (which is then not stored again), otherwise stores it
+        and returns None.
+        """
+        sig = fingerprint(f0, frame_rms)
+        with self._lock:
+            if sig is None:
+                self.stats_counters["no_fingerprint"] += 1
+                return None
+            self.stats_counters["checked"] += 1
+            match = self._query(sig)
+            if match is not None:
+                self.stats_counters["flagged"] += 1
+                return match
+            self._add(sig, int(time.time()))
+            self._since_snapshot += 1
+        return None
+
+    def snapshot_due(self) -> bool:
+        return self.snapshot_path is not None and self._since_snapshot >= self.snapshot_every
+
+    def start_sync(self):
+        """Save and refresh every `sync_sec` on the running event loop (no-op without a snapshot file)."""
+        if self.snapshot_path is not None and (self._syncer is None or self._syncer.done()):
+            self._syncer = asyncio.create_task(self._sync())
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "pending": len(self.pending),
+            "memory_bytes": self.nbytes(),
+            **self.stats_counters,
+        }
+
+    def nbytes(self) -> int:
+        return self.sigs.nbytes + self.added_at.nbytes + self.overwritten.nbytes + self.keys.nbytes + self.slots.nbytes
+
+    # --- Snapshots ---
+
+    def save(self):
+        """
+        Merge the ring into `snapshot_path` (written with atomic_write).
+
+        Every worker keeps its own index but they share the file, so the save
+        runs under a file lock and keeps the newest `capacity` distinct
+        signatures from the file and this process together — no worker's
+        fingerprints are lost to another's save.
+        """
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            n = len(self)
+            sigs, added_at = self.sigs[:n].copy(), self.added_at[:n].copy()
+            self._since_snapshot = 0
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.snapshot_path.with_name(f"{self.snapshot_path.name}.lock")):
+            stored = self._read_snapshot()
+            if stored is not None:
+                sigs, added_at = np.concatenate([stored[0], sigs]), np.concatenate([stored[1], added_at])
+            # Newest first, so the copy np.unique keeps of a signature in both is the latest
+            order = np.argsort(added_at, kind="stable")[::-1]
+            sigs, added_at = sigs[order], added_at[order]
+            _, first = np.unique(_row_keys(sigs), return_index=True)
+            keep = np.sort(first)[: self.capacity][::-1]  # chronological, so the ring starts at slot 0
+            with atomic_write(self.snapshot_path) as fh:
+                np.savez(fh, key=np.str_(FINGERPRINT_KEY), sigs=sigs[keep], added_at=added_at[keep], inserted=np.int64(len(keep)))
+
+    def refresh(self) -> int:
+        """
+        Add the snapshot's signatures that this process does not have yet
+        (other workers' saves), oldest first. Returns how many were added.
+        The file is only re-read after its mtime changes.
+        """
+        try:
+            mtime = self.snapshot_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        if mtime == self._snapshot_mtime:
+            return 0
+        self._snapshot_mtime = mtime
+        stored = self._read_snapshot()
+        if stored is None:
+            return 0
+        sigs, added_at, _ = stored
+
+        with self._lock:
+            n = len(self)
+            new = ~np.isin(_row_keys(sigs), _row_keys(self.sigs[:n]))
+            if n == self.capacity:
+                new &= added_at >= self.added_at.min()  # Older than everything kept here: would be evicted first anyway
+            order = np.flatnonzero(new)[np.argsort(added_at[new], kind="stable")]
+            self._add_many(sigs[order], added_at[order])
+        if len(order):
+            print(f"[REPLAY] Added {len(order)} fingerprints from {self.snapshot_path}")
+        return len(order)
+
+    def load(self) -> bool:
+        """Restore from `snapshot_path` if it exists and was written with the current fingerprint parameters."""
+        if self.snapshot_path is not None and self.snapshot_path.exists():
+            self._snapshot_mtime = self.snapshot_path.stat().st_mtime_ns
+        stored = self._read_snapshot()
+        if stored is None:
+            return False
+        sigs, added_at, inserted = stored
+
+        with self._lock:
+            if len(sigs) > self.capacity:
+                # Capacity shrank: keep the most recently written slots
+                chronological = np.roll(np.arange(len(sigs)), -(inserted % len(sigs)))
+                keep = chronological[-self.capacity:]
+                sigs, added_at, inserted = sigs[keep], added_at[keep], self.capacity
+            self.sigs[: len(sigs)] = sigs
+            self.added_at[: len(sigs)] = added_at
+            self.inserted = inserted
+            self.pending = []
+            self._rebuild()
+        return True
+
+    def _read_snapshot(self) -> tuple[np.ndarray, np.ndarray, int] | None:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return None
+        with np.load(self.snapshot_path) as data:
+            if str(data["key"]) != FINGERPRINT_KEY:
+                print(f"[REPLAY] Ignoring snapshot {self.snapshot_path} (fingerprint key {data['key']})")
+                return None
+            return data["sigs"], data["added_at"], int(data["inserted"])
+
+    async def _sync(self):
+        """Runs while the process does, so an idle worker still shares its last wins."""
+        while True:
+            await asyncio.sleep(self.sync_sec)
+            try:
+                if self._since_snapshot:
+                    await asyncio.to_thread(self.save)
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:  # a full disk or a bad file must not end the loop; the next round retries
+                print(f"[REPLAY] Snapshot sync failed: {e}")
+
+    # --- Internals (caller holds the lock) ---
+
+    def _query(self, sig: np.ndarray) -> dict | None:
+        keys = band_keys(sig)
+        candidates = []
+        for b in range(BANDS):
+            lo, hi = np.searchsorted(self.keys[b], keys[b], "left"), np.searchsorted(self.keys[b], keys[b], "right")
+            if hi > lo:
+                candidates.append(self.slots[b, lo:hi])
+        if self.pending:
+            pending = np.array(self.pending, dtype=np.int32)
+            hit = (band_keys(self.sigs[pending]) == keys).any(axis=1)
+            candidates.append(pending[hit])
+        slots = np.unique(np.concatenate(candidates)) if candidates else []
+        if len(slots) == 0:
+            return None
+        sims = similarity(sig, self.sigs[slots])
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        return {
+            "similarity": round(float(sims[best]), 3),
+            "age_sec": int(time.time()) - int(self.added_at[slots[best]]),
+            "candidates": int(len(slots)),
+        }
+
+    def _add(self, sig: np.ndarray, added_at: int):
+        slot = self.inserted % self.capacity
+        if self.inserted >= self.capacity:
+            self.overwritten[slot] = True
+        self.sigs[slot] = sig
+        self.added_at[slot] = added_at
+        self.inserted += 1
+        self.pending.append(slot)
+        if len(self.pending) >= self.merge_every:
+            self._merge()
+
+    def _add_many(self, sigs: np.ndarray, added_at: np.ndarray):
+        """_add for each row in order; a batch of merge_every or more rebuilds the band arrays once instead."""
+        if len(sigs) < self.merge_every:
+            for sig, t in zip(sigs, added_at):
+                self._add(sig, int(t))
+            return
+        sigs, added_at = sigs[-self.capacity:], added_at[-self.capacity:]
+        slots = (self.inserted + np.arange(len(sigs))) % self.capacity
+        self.sigs[slots] = sigs
+        self.added_at[slots] = added_at
+        self.inserted += len(sigs)
+        self.pending = []
+        self._rebuild()
+
+    def _merge(self):
+        """Fold pending slots into the sorted band arrays, dropping entries for overwritten slots."""
+        pending = np.array(self.pending, dtype=np.int32)
+        new_keys = band_keys(self.sigs[pending]).T  # (BANDS, m)
+        stale = self.overwritten.any()
+        merged_keys, merged_slots = [], []
+        for b in range(BANDS):
+            keys, slots = self.keys[b], self.slots[b]
+            if stale:
+                keep = ~self.overwritten[slots]
+                keys, slots = keys[keep], slots[keep]
+            order = np.argsort(new_keys[b], kind="stable")
+            at = np.searchsorted(keys, new_keys[b][order])
+            merged_keys.append(np.insert(keys, at, new_keys[b][order]))
+            merged_slots.append(np.insert(slots, at, pending[order]))
+        self.keys, self.slots = np.stack(merged_keys), np.stack(merged_slots)
+        self.overwritten[:] = False
+        self.pending = []
+
+    def _rebuild(self):
+        n = len(self)
+        keys = band_keys(self.sigs[:n]).T
+        order = np.argsort(keys, axis=1, kind="stable").astype(np.int32)
+        self.keys = np.take_along_axis(keys, order, axis=1)
+        self.slots = order
+        self.overwritten[:] = False
+
+
+# --- Benchmark ---
+
+def _bench(n: int, queries: int):
+    import resource
+
+    from config import CONFIG
+
+    if not os.path.exists("assets/uwu_template.npy"):
+        raise SystemExit("Template not found at assets/uwu_template.npy. Start the server once to generate it.")
+    template = np.load("assets/uwu_template.npy")
+    rng = np.random.default_rng(1)
+
+    def honest_attempt() -> np.ndarray:
+        # f0 of the template sung in a random key with random tempo, drift and
+        # wobble: a stand-in for real attempts, which all share its shape
+        idx = np.arange(len(template))
+        warp = np.clip(idx * rng.uniform(0.85, 1.15) + np.cumsum(rng.normal(0, 0.3, len(idx))), 0, len(idx) - 1)
+        c = np.interp(warp, idx, template)
+        wobble = np.convolve(rng.normal(0, 0.6, len(idx)), np.ones(9) / 9, "same")
+        return np.where(c != 0, rng.uniform(300, 1200) * 2 ** ((c + wobble) / 12), np.nan)
+
+    index = ReplayIndex({**CONFIG, "replay_index_capacity": n, "replay_index_path": None})
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    t0 = time.perf_counter()
+    tracks = [honest_attempt() for _ in range(min(n, 10_000))]
+    for i in range(n):
+        index.sigs[i] = fingerprint(tracks[i] if i < len(tracks) else honest_attempt())
+    fp_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    index.added_at[:] = int(time.time())
+    index.inserted = n
+    index._rebuild()
+    print(f"fingerprint: {fp_us:.0f} µs/track (incl. synthesis); index of {n:,} built in {time.perf_counter() - t0:.2f}s")
+    print(f"index arrays: {index.nbytes() / 2**20:.1f} MiB ({index.nbytes() / n:.0f} B/entry); "
+          f"peak RSS growth {(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024:.0f} MiB")
+
+    def timed(label: str, attempts: list):
+        latencies, flagged = [], 0
+        for f0 in attempts:
+            sig = fingerprint(f0)
+            t = time.perf_counter()
+            flagged += index._query(sig) is not None
+            latencies.append(time.perf_counter() - t)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+        print(f"{label:<28} lookup p50 {p50:6.1f} µs  p99 {p99:6.1f} µs  flagged {flagged}/{len(attempts)}")
+
+    timed("fresh honest attempts", [honest_attempt() for _ in range(queries)])
+    replays = [tracks[i] for i in rng.integers(0, len(tracks), queries)]
+    timed("exact replays", replays)
+    timed("replays, 0.02 st f0 jitter", [f0 * 2 ** (rng.normal(0, 0.02, len(f0)) / 12) for f0 in replays])
+    # Leading padding, after grid_offset: the same track a whole number of frames later
+    timed("replays, padded 1-4 frames", [np.concatenate([np.full(rng.integers(1, 5), np.nan), f0]) for f0 in replays])
+
+    t0 = time.perf_counter()
+    for f0 in [honest_attempt() for _ in range(index.merge_every)]:
+        index._add(fingerprint(f0), 0)
+    print(f"insert: {(time.perf_counter() - t0) / index.merge_every * 1e6:.0f} µs/entry amortized (incl. synthesis and one merge)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bench", type=int, metavar="N", required=True, help="Index size to benchmark")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    _bench(args.bench, args.queries)
@@ -0,0 +1,226 @@
+"""
+Offline re-scoring of archived recordings under alternative detection configs.
+
+Replays every recording in a RecordingArchive through UWUDetector.analyze for
+each point of a parameter grid, in parallel across cores, and reports pass
+rate and score distribution per config.
+
+f0 tracks are cached in <archive>/.contours-<extraction key>.npz, so a sweep
+only re-runs pyin for recordings that are new (or when --reextract is given);
+everything else is DTW and scoring.
+
+Usage (from backend/, after running the server once so assets/uwu_template.npy exists):
+
+    python rescore.py /data/uwu-archive \\
+        --grid dtw_threshold=8,10,12 \\
+        --grid pitch_tolerance=6,8 \\
+        --grid dtw_window_frames=15,30,none \\
+        --workers 8 --json sweep.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from archive import RecordingArchive
+from audio_processor import AudioProcessor
+from config import CONFIG
+from replay_index import grid_offset
+from shared_store import atomic_write
+from uwu_detector import UWUDetector
+
+SWEEPABLE = {
+    "dtw_threshold": float,
+    "pitch_tolerance": float,
+    "dtw_window_frames": int,
+    "min_voiced_ratio": float,
+}
+
+
+# --- Contour extraction (phase 1) ---
+
+_processor: AudioProcessor | None = None
+
+
+def _extract_one(path: str, extraction_key: str, reextract: bool) -> tuple[str, np.ndarray, float, bool]:
+    """Return (name, f0, target_hz, live_passed) for one archived recording."""
+    global _processor
+    record = RecordingArchive.load(Path(path))
+    if reextract or record["extraction_key"] != extraction_key:
+        if _processor is None:
+            _processor = AudioProcessor(sr=CONFIG["sample_rate"])
+        y = _processor.load_pcm(record["pcm"].astype(np.float32) / 32768.0, int(record["sr"]))
+        # Same onset-anchored frame grid as live analysis
+        y = y[grid_offset(y, _processor.hop_length) :]
+        f0 = _processor.extract_contour(y)["f0"].astype(np.float32)
+    else:
+        f0 = record["f0"]
+    return Path(path).relative_to(Path(path).parents[1]).as_posix(), f0, float(record["target_hz"]), bool(record["passed"])
+
+
+def load_contours(archive: RecordingArchive, workers: int, reextract: bool) -> Path:
+    """Bring the f0 cache up to date with the archive and return its path."""
+    extraction_key = AudioProcessor(sr=CONFIG["sample_rate"]).extraction_key()
+    cache_path = archive.root / f".contours-{extraction_key}.npz"
+
+    cached: dict[str, tuple] = {}
+    if cache_path.exists() and not reextract:
+        with np.load(cache_path) as c:
+            bounds = np.append(c["offsets"], len(c["f0"]))
+            for i, name in enumerate(c["names"]):
+                cached[str(name)] = (c["f0"][bounds[i]:bounds[i + 1]], c["target_hz"][i], c["live_passed"][i])
+
+    paths = archive.paths()
+    missing = [p for p in paths if p.relative_to(archive.root).as_posix() not in cached]
+    if missing:
+        print(f"[RESCORE] Extracting contours for {len(missing)} of {len(paths)} recordings...")
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                _extract_one,
+                [str(p) for p in missing],
+                itertools.repeat(extraction_key),
+                itertools.repeat(reextract),
+                chunksize=max(1, min(64, len(missing) // (workers * 4))),
+            )
+            for name, f0, target_hz, passed in results:
+                cached[name] = (f0, target_hz, passed)
+        print(f"[RESCORE] Extraction took {time.perf_counter() - t0:.1f}s")
+
+        names = sorted(cached)
+        lengths = np.array([len(cached[n][0]) for n in names], dtype=np.int64)
+        with atomic_write(cache_path) as fh:
+            np.savez(
+                fh,
+                names=np.array(names),
+                offsets=np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64),
+                f0=np.concatenate([cached[n][0] for n in names]).astype(np.float32),
+                target_hz=np.array([cached[n][1] for n in names], dtype=np.float64),
+                live_passed=np.array([cached[n][2] for n in names], dtype=bool),
+            )
+    return cache_path
+
+
+# --- Scoring (phase 2) ---
+
+_cache: dict = {}
+
+
+def _init_scorer(cache_path: str, template_path: str):
+    data = np.load(cache_path)
+    _cache["f0"] = data["f0"]
+    _cache["bounds"] = np.append(data["offsets"], len(data["f0"]))
+    _cache["target_hz"] = data["target_hz"]
+    _cache["template"] = np.load(template_path)
+    _cache["processor"] = AudioProcessor(sr=CONFIG["sample_rate"])
+
+
+def _score_chunk(overrides: dict, start: int, end: int) -> tuple[np.ndarray, np.ndarray]:
+    # contour_from_f0 reads min_voiced_ratio from the global CONFIG
+    CONFIG.update(overrides)
+    detector = UWUDetector(_cache["template"], CONFIG)
+    processor, f0, bounds = _cache["processor"], _cache["f0"], _cache["bounds"]
+
+    passed = np.zeros(end - start, dtype=bool)
+    scores = np.zeros(end - start, dtype=np.int32)
+    for i in range(start, end):
+        contour = processor.contour_from_f0(f0[bounds[i]:bounds[i + 1]].astype(np.float64))
+        analysis = detector.analyze(contour, float(_cache["target_hz"][i]))
+        passed[i - start] = analysis["passed"]
+        scores[i - start] = analysis["performance_score"]
+    return passed, scores
+
+
+def summarize(overrides: dict, passed: np.ndarray, scores: np.ndarray) -> dict:
+    pct = np.percentile(scores, [10, 25, 50, 75, 90]) if len(scores) else np.zeros(5)
+    return {
+        "config": overrides,
+        "recordings": int(len(passed)),
+        "pass_rate": round(float(passed.mean()), 4) if len(passed) else 0.0,
+        "score_percentiles": dict(zip(("p10", "p25", "p50", "p75", "p90"), pct.round().astype(int).tolist())),
+        "mean_passing_score": round(float(scores[passed].mean()), 1) if passed.any() else 0.0,
+        "score_histogram": np.histogram(scores, bins=10, range=(0, 10000))[0].tolist(),
+    }
+
+
+def parse_grid(specs: list[str]) -> list[dict]:
+    axes = []
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        if key not in SWEEPABLE or not values:
+            raise SystemExit(f"Bad --grid '{spec}'. Sweepable keys: {', '.join(SWEEPABLE)}")
+        cast = SWEEPABLE[key]
+        axes.append([(key, None if v.lower() == "none" else cast(v)) for v in values.split(",")])
+    current = {key: CONFIG[key] for key in SWEEPABLE}
+    grid = [current]
+    for combo in itertools.product(*axes) if axes else []:
+        point = {**current, **dict(combo)}
+        if point not in grid:
+            grid.append(point)
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archive", help="Archive directory (CONFIG['archive_dir'] on the server)")
+    parser.add_argument("--grid", action="append", default=[], help="key=v1,v2,... (repeatable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--template", default="assets/uwu_template.npy")
+    parser.add_argument("--reextract", action="store_true", help="Re-run pyin on every recording")
+    parser.add_argument("--json", help="Write full results to this file")
+    args = parser.parse_args()
+
+    if not Path(args.template).exists():
+        raise SystemExit(f"Template not found at {args.template}. Start the server once to generate it.")
+
+    archive = RecordingArchive(args.archive)
+    cache_path = load_contours(archive, args.workers, args.reextract)
+    with np.load(cache_path) as c:
+        n = len(c["names"])
+        live_pass_rate = float(c["live_passed"].mean()) if n else 0.0
+    if n == 0:
+        raise SystemExit("Archive is empty")
+
+    grid = parse_grid(args.grid)
+    chunk = max(1, min(2000, n // (args.workers * 4) or 1))
+    ranges = [(s, min(s + chunk, n)) for s in range(0, n, chunk)]
+    print(f"[RESCORE] {n} recordings × {len(grid)} configs on {args.workers} workers")
+
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_scorer,
+        initargs=(str(cache_path), args.template),
+    ) as pool:
+        # Submit the whole grid up front so workers never idle between configs
+        futures = [[pool.submit(_score_chunk, point, s, e) for s, e in ranges] for point in grid]
+        for point, chunk_futures in zip(grid, futures):
+            parts = [f.result() for f in chunk_futures]
+            passed = np.concatenate([p for p, _ in parts])
+            scores = np.concatenate([s for _, s in parts])
+            results.append(summarize(point, passed, scores))
+    elapsed = time.perf_counter() - t0
+
+    print(f"\nLive pass rate (as played): {live_pass_rate:.1%}\n")
+    print(f"{'dtw_thr':>8} {'pitch_tol':>9} {'window':>7} {'min_vr':>7} {'pass':>7} {'p10':>6} {'p50':>6} {'p90':>6}")
+    for r in results:
+        c, p = r["config"], r["score_percentiles"]
+        print(
+            f"{c['dtw_threshold']:>8} {c['pitch_tolerance']:>9} {str(c['dtw_window_frames']):>7} "
+            f"{c['min_voiced_ratio']:>7} {r['pass_rate']:>7.1%} {p['p10']:>6} {p['p50']:>6} {p['p90']:>6}"
+        )
+    print(f"\n[RESCORE] Scored {n * len(grid)} analyses in {elapsed:.1f}s (first row = current config)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"live_pass_rate": live_pass_rate, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
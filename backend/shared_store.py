@@ -0,0 +1,191 @@
+"""
+Read-only NumPy arrays shared between worker processes through one mmap'd file
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"UWUSHM\x00\x00"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")  # magic, format version, header length
+_ALIGN = 64
+
+
+class SharedArrays:
+    """
+    Zero-copy, read-only views into a store file.
+
+    Every process that opens the same file maps the same page-cache pages, so
+    the arrays are held in memory once however many workers there are. The
+    views are not writeable; copy before modifying.
+    """
+
+    def __init__(self, path: Path, mm: mmap.mmap, header: dict, data_start: int):
+        self.path = path
+        self.key = header["key"]
+        self.meta = header["meta"]
+        self._mm = mm  # keeps the mapping alive as long as the views
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            count = int(np.prod(spec["shape"]))
+            view = np.frombuffer(mm, dtype=spec["dtype"], count=count, offset=data_start + spec["offset"])
+            self.arrays[name] = view.reshape(spec["shape"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values())
+
+
+def _data_start(header_len: int) -> int:
+    """Arrays start at the first aligned offset after the header; their offsets are relative to it."""
+    return -(-(_PREAMBLE.size + header_len) // _ALIGN) * _ALIGN
+
+
+def write_store(path: Path, key: str, arrays: dict[str, np.ndarray], meta: dict):
+    """
+    Write `arrays` to `path` with a header recording `key` and `meta`.
+
+    The file is written beside the target and renamed into place, so readers
+    never map a partial store; processes still mapping a replaced store keep
+    their (now unlinked) copy until they exit.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+
+    specs, offset = {}, 0
+    for name, a in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        specs[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes
+    header = {"key": key, "meta": meta, "arrays": specs}
+
+    header_bytes = json.dumps(header).encode()
+    data_start = _data_start(len(header_bytes))
+
+    with atomic_write(path, fsync=True) as fh:
+        fh.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        fh.write(header_bytes)
+        for name, a in arrays.items():
+            fh.seek(data_start + specs[name]["offset"])
+            fh.write(a.tobytes())
+
+
+def open_store(path: Path, key: str) -> SharedArrays | None:
+    """Map the store at `path`. None if it is missing, corrupt, or built for a different key."""
+    try:
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: empty file
+        return None
+    try:
+        magic, version, header_len = _PREAMBLE.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("not a store of this format")
+        header = json.loads(mm[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        if header["key"] != key:
+            raise ValueError("stale store")
+        return SharedArrays(path, mm, header, _data_start(header_len))
+    except (struct.error, ValueError, KeyError):
+        mm.close()
+        return None
+
+
+def load_or_build(
+    path: Path, key: str, build: Callable[[], tuple[dict[str, np.ndarray], dict]]
+) -> tuple[SharedArrays, bool]:
+    """
+    Attach to the store at `path`, building it first if it is missing or stale.
+
+    The first process to start takes an exclusive lock and runs `build()`
+    (which returns (arrays, meta)); processes starting meanwhile wait on the
+    lock and then attach to what it wrote. Returns (store, built_here).
+    """
+    store = open_store(path, key)
+    if store is not None:
+        return store, False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path.with_name(f"{path.name}.lock")):
+        # Another worker may have built it while we waited for the lock
+        store = open_store(path, key)
+        if store is not None:
+            return store, False
+        arrays, meta = build()
+        write_store(path, key, arrays, meta)
+
+    store = open_store(path, key)
+    if store is None:
+        raise RuntimeError(f"Shared store at {path} unreadable right after writing it")
+    return store, True
+
+
+@contextmanager
+def atomic_write(path: Path, fsync: bool = False):
+    """
+    Binary file handle whose contents replace `path` when the block exits cleanly.
+
+    Writes go to a temp file beside `path` (same filesystem), which os.replace
+    swaps in — atomic on POSIX and Windows alike, so readers see the old file
+    or the new one, never part of one. On an exception the temp file is
+    removed and `path` is left as it was. Temp names start with a dot and end
+    in .tmp, so directory scans skip them.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            yield fh
+            if fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Hold an exclusive lock on `path` (created if missing) for the duration of the block."""
+    with open(path, "w") as fh:
+        _lock(fh)
+        try:
+            yield
+        finally:
+            _unlock(fh)
+
+
+def _lock(fh):
+    """Block until this process holds the exclusive lock on `fh`."""
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ~10 s; a build can take longer, so keep waiting
+            continue
+
+
+def _unlock(fh):
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,116 @@
+"""
+Database-level test for leaderboard.py: insert_entry, get_rank / get_ranks,
+the rollup backfill in init_db and bucket expiry.
+
+Runs the real module against a scratch Postgres database, so it checks the
+SQL the API runs without needing a server. The leaderboard tables in that
+database are DROPPED.
+
+Usage (from backend/):
+
+    LEADERBOARD_TEST_DATABASE_URL=postgresql://... python test_leaderboard_db.py
+
+Exits non-zero on the first failed assertion.
+"""
+
+import os
+import sys
+
+import psycopg2
+
+import leaderboard
+
+
+def sql(query: str, *args):
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn, conn.cursor() as cur:
+        cur.execute(query, args)
+        return cur.fetchall() if cur.description else None
+
+
+def names(table: str) -> list[str]:
+    return sorted(row[0] for row in sql(f"SELECT name FROM {table}"))
+
+
+def reset():
+    sql("DROP TABLE IF EXISTS leaderboard_daily, leaderboard_weekly, leaderboard")
+    leaderboard.init_db()
+
+
+def check_insert():
+    """insert_entry writes the entry and both rollups, in the current bucket."""
+    reset()
+    eid = leaderboard.insert_entry("ALPHA", 500)
+    assert eid > 0
+    daily = sql("SELECT entry_id, name, score, bucket = (NOW() AT TIME ZONE 'UTC')::date FROM leaderboard_daily")
+    weekly = sql(
+        "SELECT entry_id, name, score, bucket = date_trunc('week', NOW() AT TIME ZONE 'UTC')::date "
+        "FROM leaderboard_weekly"
+    )
+    assert daily == [(eid, "ALPHA", 500, True)], daily
+    assert weekly == [(eid, "ALPHA", 500, True)], weekly
+
+
+def check_ranks():
+    """get_rank / get_ranks: score DESC, ties go to the earlier entry."""
+    reset()
+    ids = [leaderboard.insert_entry(n, s) for n, s in [("LOW", 100), ("TOP", 300), ("MID", 200), ("TIE", 300)]]
+    for eid, rank in zip(ids, [4, 1, 3, 2]):
+        assert leaderboard.get_ranks(eid) == {"daily": rank, "weekly": rank, "all": rank}, (eid, leaderboard.get_ranks(eid))
+        assert [leaderboard.get_rank(eid, w) for w in leaderboard.WINDOWS] == [rank] * 3
+    assert leaderboard.get_ranks(999999) == {"daily": 0, "weekly": 0, "all": 0}
+    assert [e["name"] for e in leaderboard.get_top(3, "daily")] == ["TOP", "TIE", "MID"]
+
+
+def check_backfill():
+    """init_db backfills entries inside each rollup's retention, idempotently."""
+    reset()
+    sql("DROP TABLE leaderboard_daily, leaderboard_weekly")
+    for name, age in [("NOW", "0 days"), ("D3", "3 days"), ("D30", "30 days"), ("D200", "200 days")]:
+        sql("INSERT INTO leaderboard (name, score, created_at) VALUES (%s, 100, NOW() - %s::interval)", name, age)
+    leaderboard.init_db()
+    leaderboard.init_db()
+
+    assert names("leaderboard_daily") == ["D3", "NOW"], names("leaderboard_daily")
+    assert names("leaderboard_weekly") == ["D3", "D30", "NOW"], names("leaderboard_weekly")
+    assert sql("SELECT bucket = ((created_at AT TIME ZONE 'UTC')::date) FROM leaderboard_daily WHERE name = 'D3'") == [(True,)]
+
+    ids = dict(sql("SELECT name, id FROM leaderboard"))
+    now_id, d3_id = ids["NOW"], ids["D3"]
+    # Older entries with the same score rank ahead on "all" but not on today's board
+    ranks = leaderboard.get_ranks(now_id)
+    assert ranks["daily"] == 1 and ranks["all"] == 4, ranks
+    assert leaderboard.get_rank(d3_id, "daily") == 0, "a past day's entry is not on today's board"
+
+
+def check_expiry():
+    """insert_entry expires rollup buckets past their retention, never the full table."""
+    reset()
+    old = leaderboard.insert_entry("OLD", 100)
+    sql("UPDATE leaderboard_daily SET bucket = bucket - 8 WHERE entry_id = %s", old)
+    sql("UPDATE leaderboard_weekly SET bucket = bucket - 7 * 9 WHERE entry_id = %s", old)
+    kept = leaderboard.insert_entry("KEPT", 100)
+    sql("UPDATE leaderboard_daily SET bucket = bucket - 6 WHERE entry_id = %s", kept)
+    leaderboard.insert_entry("NEW", 100)
+
+    assert names("leaderboard") == ["KEPT", "NEW", "OLD"], "expiry must not touch the full table"
+    assert names("leaderboard_daily") == ["KEPT", "NEW"], names("leaderboard_daily")
+    assert names("leaderboard_weekly") == ["KEPT", "NEW"], names("leaderboard_weekly")
+
+
+def main():
+    url = os.environ.get("LEADERBOARD_TEST_DATABASE_URL")
+    if not url:
+        sys.exit("LEADERBOARD_TEST_DATABASE_URL is not set (use a scratch database)")
+    # Set after importing leaderboard, so a DATABASE_URL from .env cannot win
+    os.environ["DATABASE_URL"] = url
+
+    print("\n=== Leaderboard DB Test ===\n")
+    for i, check in enumerate((check_insert, check_ranks, check_backfill, check_expiry), 1):
+        print(f"{i}. {check.__doc__.splitlines()[0]}")
+        check()
+        print("   OK")
+    print("\n=== PASSED ===\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Streaming, size-bounded parsing of multipart WAV uploads
+"""
+
+import struct
+
+import numpy as np
+from fastapi import HTTPException, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Room for multipart boundaries, part headers and small text fields on top of the audio itself
+MULTIPART_OVERHEAD_BYTES = 32 * 1024
+# Cap on each accepted text field (e.g. a client-side f0 track as JSON)
+MAX_TEXT_FIELD_BYTES = 16 * 1024
+# A WAV header (RIFF + fmt + any LIST/fact chunks) larger than this is not from our recorder
+MAX_WAV_HEADER_BYTES = 4096
+
+# (format tag, bits per sample) → numpy dtype
+_PCM_FORMATS = {
+    (1, 16): np.dtype("<i2"),
+    (3, 32): np.dtype("<f4"),
+}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavStream:
+    """
+    Incremental WAV decoder fed one chunk at a time.
+
+    The RIFF header is validated as soon as enough bytes arrive, so non-WAV
+    or unsupported uploads are rejected on the first chunk. PCM bytes are
+    copied straight into a single buffer preallocated from the declared
+    data size (or `max_bytes` if the header does not declare one).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.header = bytearray()
+        self.buffer: bytearray | None = None
+        self.length = 0
+        self.declared_size = 0
+        self.dtype: np.dtype | None = None
+        self.channels = 0
+        self.sample_rate = 0
+        self.block_align = 0
+
+    def feed(self, data: bytes):
+        if self.buffer is None:
+            self.header += data
+            remainder = self._parse_header()
+            if remainder is None:
+                if len(self.header) > MAX_WAV_HEADER_BYTES:
+                    raise HTTPException(415, "Unsupported WAV layout")
+                return
+            data = remainder
+        self._write(data)
+
+    def samples(self) -> tuple[np.ndarray, int]:
+        """Return (mono float32 samples, sample rate)."""
+        if self.buffer is None:
+            raise HTTPException(415, "Audio must be a WAV file")
+        usable = self.length - self.length % self.block_align
+        pcm = np.frombuffer(self.buffer, dtype=self.dtype, count=usable // self.dtype.itemsize)
+        if self.dtype.kind == "i":
+            y = pcm.astype(np.float32) / 32768.0
+        else:
+            y = pcm.astype(np.float32, copy=False)
+        if self.channels > 1:
+            y = y.reshape(-1, self.channels).mean(axis=1)
+        return y, self.sample_rate
+
+    def _write(self, data: bytes):
+        room = len(self.buffer) - self.length
+        if len(data) > room:
+            if not self.declared_size:
+                raise HTTPException(413, "Audio file too large")
+            # Trailing chunks after a declared data chunk (e.g. LIST) are ignored
+            data = data[:room]
+        self.buffer[self.length : self.length + len(data)] = data
+        self.length += len(data)
+
+    def _parse_header(self) -> bytes | None:
+        """Parse RIFF chunks up to `data`; return bytes past the header, or None if incomplete."""
+        hdr = self.header
+        if len(hdr) < 12:
+            return None
+        if hdr[0:4] != b"RIFF" or hdr[8:12] != b"WAVE":
+            raise HTTPException(415, "Audio must be a WAV file")
+
+        offset = 12
+        while len(hdr) >= offset + 8:
+            chunk_id = bytes(hdr[offset : offset + 4])
+            (chunk_size,) = struct.unpack_from("<I", hdr, offset + 4)
+            body = offset + 8
+            if chunk_id == b"data":
+                if self.dtype is None:
+                    raise HTTPException(415, "WAV is missing its fmt chunk")
+                self._allocate(chunk_size)
+                return bytes(hdr[body:])
+            if len(hdr) < body + chunk_size:
+                return None
+            if chunk_id == b"fmt ":
+                self._parse_fmt(hdr[body : body + chunk_size])
+            offset = body + chunk_size + (chunk_size & 1)
+        return None
+
+    def _parse_fmt(self, fmt: bytes):
+        if len(fmt) < 16:
+            raise HTTPException(415, "Malformed WAV fmt chunk")
+        tag, channels, rate, _, block_align, bits = struct.unpack_from("<HHIIHH", fmt)
+        if tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            (tag,) = struct.unpack_from("<H", fmt, 24)  # first field of the SubFormat GUID
+        dtype = _PCM_FORMATS.get((tag, bits))
+        if dtype is None:
+            raise HTTPException(415, "WAV must be 16-bit PCM or 32-bit float")
+        if not 1 <= channels <= 2 or not 8000 <= rate <= 192000:
+            raise HTTPException(415, "Unsupported WAV channel count or sample rate")
+        if block_align != channels * dtype.itemsize:
+            raise HTTPException(415, "Malformed WAV fmt chunk")
+        self.dtype, self.channels, self.sample_rate, self.block_align = dtype, channels, rate, block_align
+
+    def _allocate(self, declared: int):
+        # 0 and 0xFFFFFFFF are used by streaming writers that don't know the length yet
+        if 0 < declared < 0xFFFFFFFF:
+            if declared > self.max_bytes:
+                raise HTTPException(413, "Audio file too large")
+            self.declared_size = declared
+            self.buffer = bytearray(declared)
+        else:
+            self.buffer = bytearray(self.max_bytes)
+
+
+async def read_wav_upload(
+    request: Request,
+    field_name: str,
+    max_bytes: int,
+    text_fields: tuple[str, ...] = (),
+) -> tuple[np.ndarray, int, dict[str, str]]:
+    """
+    Stream a multipart body and decode the WAV in `field_name`, enforcing
+    `max_bytes` on the audio and on the body as a whole while reading.
+
+    Returns (mono float32 samples, sample rate, text fields). Only the text
+    fields named in `text_fields` are kept (up to MAX_TEXT_FIELD_BYTES each);
+    other form parts are skipped.
+    """
+    body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(400, "Expected a multipart/form-data upload")
+
+    wav: WavStream | None = None
+    fields: dict[str, bytearray] = {}
+    state = {"in_audio": False, "text": None, "header_name": b"", "header_value": b"", "disposition": b""}
+
+    def on_part_begin():
+        state["in_audio"] = False
+        state["text"] = None
+        state["disposition"] = b""
+
+    def on_header_field(data, start, end):
+        state["header_name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        if state["header_name"].lower() == b"content-disposition":
+            state["disposition"] = state["header_value"]
+        state["header_name"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        nonlocal wav
+        _, options = parse_options_header(state["disposition"])
+        name = options.get(b"name", b"").decode("latin-1")
+        if name == field_name and wav is None:
+            wav = WavStream(max_bytes)
+            state["in_audio"] = True
+        elif name in text_fields and name not in fields:
+            fields[name] = bytearray()
+            state["text"] = fields[name]
+
+    def on_part_data(data, start, end):
+        if state["in_audio"]:
+            wav.feed(memoryview(data)[start:end])
+        elif state["text"] is not None:
+            state["text"] += memoryview(data)[start:end]
+            if len(state["text"]) > MAX_TEXT_FIELD_BYTES:
+                raise HTTPException(413, "Form field too large")
+
+    def on_part_end():
+        state["in_audio"] = False
+        state["text"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise HTTPException(413, "Audio file too large")
+            parser.write(chunk)
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(400, f"Malformed multipart body: {e}")
+
+    if wav is None:
+        raise HTTPException(422, "Missing audio upload")
+    if wav.length < 1000:
+        raise HTTPException(400, "Audio file too small")
+    samples, sample_rate = wav.samples()
+    return samples, sample_rate, {k: v.decode("utf-8", errors="replace") for k, v in fields.items()}
@@ -1,3 +1,11 @@
+// YIN pitch tracker settings — frames match the backend's 512-sample hop
+const HOP = 512;
+const WINDOW = 1024;
+const FMIN = 130.8; // C3, same range as the backend's pyin
+const FMAX = 2093.0; // C7
+const YIN_THRESHOLD = 0.15;
+const SILENCE_RMS = 0.01;
+
 class RecorderProcessor extends AudioWorkletProcessor {
   constructor() {
     super();
@@ -5,6 +13,18 @@ class RecorderProcessor extends AudioWorkletProcessor {
     this.port.onmessage = (e) => {
       if (e.data === 'stop') this._stopped = true;
     };
+
+    // `sampleRate` is a global in AudioWorkletGlobalScope
+    this._tauMin = Math.floor(sampleRate / FMAX);
+    this._tauMax = Math.ceil(sampleRate / FMIN);
+    this._buf = new Float32Array(WINDOW + this._tauMax);
+    this._filled = 0;
+    this._diff = new Float32Array(this._tauMax + 1);
+
+    // Frame j is centred on sample j * HOP + buf.length / 2 of the recording
+    this.port.postMessage({
+      pitchTrackInfo: { hopSec: HOP / sampleRate, startSec: this._buf.length / 2 / sampleRate },
+    });
   }
 
   process(inputs) {
@@ -12,9 +32,63 @@ class RecorderProcessor extends AudioWorkletProcessor {
     const input = inputs[0];
     if (input && input[0] && input[0].length > 0) {
       this.port.postMessage(new Float32Array(input[0]));
+      this._track(input[0]);
     }
     return true;
   }
+
+  _track(samples) {
+    let offset = 0;
+    while (offset < samples.length) {
+      const n = Math.min(samples.length - offset, this._buf.length - this._filled);
+      this._buf.set(samples.subarray(offset, offset + n), this._filled);
+      this._filled += n;
+      offset += n;
+      if (this._filled === this._buf.length) {
+        this.port.postMessage({ f0: this._yin() });
+        this._buf.copyWithin(0, HOP);
+        this._filled -= HOP;
+      }
+    }
+  }
+
+  // Returns f0 in Hz, or 0 for unvoiced
+  _yin() {
+    const buf = this._buf;
+    const diff = this._diff;
+
+    let energy = 0;
+    for (let i = 0; i < WINDOW; i++) energy += buf[i] * buf[i];
+    if (Math.sqrt(energy / WINDOW) < SILENCE_RMS) return 0;
+
+    // Cumulative mean normalised difference function
+    diff[0] = 1;
+    let runningSum = 0;
+    for (let tau = 1; tau <= this._tauMax; tau++) {
+      let d = 0;
+      for (let i = 0; i < WINDOW; i++) {
+        const delta = buf[i] - buf[i + tau];
+        d += delta * delta;
+      }
+      runningSum += d;
+      diff[tau] = runningSum > 0 ? (d * tau) / runningSum : 1;
+    }
+
+    // First dip below threshold, then walk down to its local minimum
+    for (let tau = this._tauMin; tau < this._tauMax; tau++) {
+      if (diff[tau] < YIN_THRESHOLD) {
+        while (tau + 1 < this._tauMax && diff[tau + 1] < diff[tau]) tau++;
+        // Parabolic interpolation around the minimum
+        const a = diff[tau - 1];
+        const b = diff[tau];
+        const c = diff[tau + 1];
+        const denom = a + c - 2 * b;
+        const shift = denom !== 0 ? (a - c) / (2 * denom) : 0;
+        return sampleRate / (tau + shift);
+      }
+    }
+    return 0;
+  }
 }
 
 registerProcessor('recorder-processor', RecorderProcessor);
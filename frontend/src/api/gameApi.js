@@ -25,6 +25,13 @@ export async function getBirdCall(sessionId, round) {
 export async function analyzeAudio(sessionId, audioBlob) {
   const formData = new FormData();
   formData.append('audio', audioBlob, 'recording.wav');
+  // Client-side pitch track (see useAudioRecorder); the server verifies it
+  if (audioBlob.pitchTrack) {
+    const { f0, hopSec, startSec } = audioBlob.pitchTrack;
+    formData.append('f0', JSON.stringify(f0.map((v) => Math.round(v * 100) / 100)));
+    formData.append('f0_hop_sec', String(hopSec));
+    formData.append('f0_start_sec', String(startSec));
+  }
 
   const resp = await fetch(
     `${API_BASE}/api/game/${sessionId}/analyze`,
@@ -33,7 +40,10 @@ export async function analyzeAudio(sessionId, audioBlob) {
       body: formData,
     }
   );
-  if (!resp.ok) throw new Error('Failed to analyze audio');
+  if (!resp.ok) {
+    const data = await resp.json().catch(() => ({}));
+    throw new Error(data.detail || 'Failed to analyze audio');
+  }
   return resp.json();
 }
 
@@ -43,14 +53,83 @@ export async function healthCheck() {
   return resp.json();
 }
 
-export async function getLeaderboard() {
-  const resp = await fetch(`${API_BASE}/api/leaderboard`);
+export async function getLeaderboard(window = 'all') {
+  const resp = await fetch(`${API_BASE}/api/leaderboard?window=${window}`);
   if (!resp.ok) throw new Error('Failed to fetch leaderboard');
   return resp.json();
 }
 
-export async function submitScore(name, score, sessionId, token) {
-  const resp = await fetch(`${API_BASE}/api/leaderboard`, {
+// Backoff between leaderboard stream reconnects after an error
+const STREAM_RETRY_MIN_MS = 1000;
+const STREAM_RETRY_MAX_MS = 30000;
+
+/**
+ * Live leaderboard over server-sent events. Calls onEntries(entries) with the
+ * current board and again after every change; returns an unsubscribe function.
+ * Falls back to a single fetch where EventSource is unavailable, and to a
+ * fetch plus reconnects with backoff when the stream errors.
+ */
+export function subscribeLeaderboard(window, onEntries) {
+  if (typeof EventSource === 'undefined') {
+    getLeaderboard(window).then((data) => onEntries(data.entries || [])).catch(() => {});
+    return () => {};
+  }
+
+  let source = null;
+  let board = null; // { version, size, entries }
+  let closed = false;
+  let retryMs = STREAM_RETRY_MIN_MS;
+  let retryTimer = null;
+
+  const connect = () => {
+    source = new EventSource(`${API_BASE}/api/leaderboard/stream`);
+    source.addEventListener('snapshot', (e) => {
+      retryMs = STREAM_RETRY_MIN_MS;
+      board = JSON.parse(e.data)[window];
+      onEntries(board.entries);
+    });
+    // Whole board for one window, sent whenever it changes on the server
+    source.addEventListener('board', (e) => {
+      const update = JSON.parse(e.data);
+      if (!board || update.window !== window || update.version <= board.version) return;
+      board = { version: update.version, size: update.size, entries: update.entries };
+      onEntries(board.entries);
+    });
+    // Sent when this client fell too far behind; the server has closed the stream
+    source.addEventListener('dropped', () => reconnect());
+    // Stream refused or lost (stream limit, restart, proxy timeout): show the
+    // board from a plain fetch and retry the stream with backoff
+    source.onerror = () => {
+      source.close();
+      board = null;
+      getLeaderboard(window)
+        .then((data) => {
+          if (!closed && !board) onEntries(data.entries || []);
+        })
+        .catch(() => {});
+      retryTimer = setTimeout(() => {
+        if (!closed) connect();
+      }, retryMs);
+      retryMs = Math.min(retryMs * 2, STREAM_RETRY_MAX_MS);
+    };
+  };
+
+  const reconnect = () => {
+    source.close();
+    board = null;
+    if (!closed) connect();
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source.close();
+  };
+}
+
+export async function submitScore(name, score, sessionId, token, window = 'all') {
+  const resp = await fetch(`${API_BASE}/api/leaderboard?window=${window}`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ name, score, session_id: sessionId, token }),
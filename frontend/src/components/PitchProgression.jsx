@@ -25,10 +25,13 @@ export default function PitchProgression({ allRounds }) {
     // Process each round
     allRounds.forEach((roundData, idx) => {
       const timeSeconds = roundData.time_frames.map((f) => f * frameToSeconds);
+      const templateTimeSeconds = (roundData.template_time_frames ?? roundData.time_frames).map(
+        (f) => f * frameToSeconds
+      );
 
       // Template trace (bird's call) for this round
       const templateTrace = {
-        x: timeSeconds,
+        x: templateTimeSeconds,
         y: roundData.template_contour,
         mode: 'lines',
         name: `Bird Round ${roundData.round}`,
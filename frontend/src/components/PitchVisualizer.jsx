@@ -25,6 +25,7 @@ export default function PitchVisualizer({ analysis }) {
     const sampleRate = 44100;
     const frameToSeconds = (hopLength / sampleRate);
     const timeSeconds = timeFrames.map((f) => f * frameToSeconds);
+    const templateTimeSeconds = (viz.template_time_frames ?? timeFrames).map((f) => f * frameToSeconds);
 
     // Calculate pitch tolerance zone in semitones
     const tolerance = viz.pitch_tolerance_semitones || 5.0;
@@ -39,7 +40,7 @@ export default function PitchVisualizer({ analysis }) {
 
     // Create traces
     const templateTrace = {
-      x: timeSeconds,
+      x: templateTimeSeconds,
       y: templateContour,
       mode: 'lines',
       name: 'Bird Call (Template)',
@@ -5,7 +5,7 @@
 import { useState, useEffect } from 'react';
 import PitchVisualizer from './PitchVisualizer';
 import PitchProgression from './PitchProgression';
-import { getLeaderboard, submitScore } from '../api/gameApi';
+import { subscribeLeaderboard, submitScore } from '../api/gameApi';
 
 export default function ResultScreen({ result, score, sessionId, scoreToken, message, onPlayAgain, analysis }) {
   const isWin = result === 'win';
@@ -18,11 +18,8 @@ export default function ResultScreen({ result, score, sessionId, scoreToken, mes
   const [submittedName, setSubmittedName] = useState(null);
   const [playerRank, setPlayerRank] = useState(null);
 
-  useEffect(() => {
-    getLeaderboard()
-      .then((data) => setEntries(data.entries || []))
-      .catch(() => {});
-  }, []);
+  // Pushed by the server whenever anyone's score lands on the board
+  useEffect(() => subscribeLeaderboard('all', setEntries), []);
 
   const [submitError, setSubmitError] = useState(null);
 
@@ -2,6 +2,11 @@
  * useAudioRecorder hook - captures mic audio and encodes as WAV
  * Uses AudioWorkletNode where available, falls back to ScriptProcessorNode.
  *
+ * The worklet also runs a YIN pitch tracker while recording. When its track
+ * is available it is attached to the returned blob as `pitchTrack` and the
+ * WAV is encoded at half rate — the backend only spot-checks the audio
+ * against the submitted contour.
+ *
  * Expects a shared AudioContext (created during a user gesture in App.jsx)
  * so that iOS Safari doesn't block audio processing.
  */
@@ -53,15 +58,23 @@ export function useAudioRecorder() {
 
       const source = audioContext.createMediaStreamSource(stream);
       const chunks = [];
+      const f0 = [];
+      let pitchTrackInfo = null;
 
       // Try AudioWorklet first (module pre-registered in App.jsx), fall back to ScriptProcessor
       let cleanup;
       try {
         const workletNode = new AudioWorkletNode(audioContext, 'recorder-processor');
         workletNode.port.onmessage = (e) => {
-          chunks.push(e.data);
-          if (chunks.length % 10 === 0) {
-            console.log('[MIC] Recorded', chunks.length, 'chunks (worklet)');
+          if (e.data instanceof Float32Array) {
+            chunks.push(e.data);
+            if (chunks.length % 10 === 0) {
+              console.log('[MIC] Recorded', chunks.length, 'chunks (worklet)');
+            }
+          } else if (e.data.f0 !== undefined) {
+            f0.push(e.data.f0);
+          } else if (e.data.pitchTrackInfo) {
+            pitchTrackInfo = e.data.pitchTrackInfo;
           }
         };
         source.connect(workletNode);
@@ -89,8 +102,17 @@ export function useAudioRecorder() {
           if (ownsContext) audioContext.close();
           setIsRecording(false);
 
-          const wavBlob = encodeWAV(chunks, actualSampleRate);
-          console.log('[MIC] WAV encoded, size:', wavBlob.size, 'bytes, sampleRate:', actualSampleRate);
+          const hasPitchTrack = pitchTrackInfo !== null && f0.length > 0;
+          const decimation = hasPitchTrack && actualSampleRate >= 32000 ? 2 : 1;
+          const wavBlob = encodeWAV(chunks, actualSampleRate, decimation);
+          if (hasPitchTrack) {
+            wavBlob.pitchTrack = { ...pitchTrackInfo, f0: f0.slice() };
+          }
+          console.log(
+            '[MIC] WAV encoded, size:', wavBlob.size,
+            'bytes, sampleRate:', actualSampleRate / decimation,
+            'pitch frames:', hasPitchTrack ? f0.length : 0
+          );
           resolve(wavBlob);
         }, durationMs);
       });
@@ -127,18 +149,30 @@ function setupScriptProcessor(audioContext, source, chunks) {
 }
 
 /**
- * Encode raw audio chunks as WAV blob
+ * Encode raw audio chunks as WAV blob, optionally decimated by an integer factor
+ * (averaging adjacent samples as a crude low-pass)
  */
-function encodeWAV(chunks, sampleRate) {
+function encodeWAV(chunks, inputSampleRate, decimation = 1) {
   // Concatenate all chunks
   const length = chunks.reduce((acc, c) => acc + c.length, 0);
-  const samples = new Float32Array(length);
+  const full = new Float32Array(length);
   let offset = 0;
   for (const chunk of chunks) {
-    samples.set(chunk, offset);
+    full.set(chunk, offset);
     offset += chunk.length;
   }
 
+  const sampleRate = Math.round(inputSampleRate / decimation);
+  let samples = full;
+  if (decimation > 1) {
+    samples = new Float32Array(Math.floor(length / decimation));
+    for (let i = 0; i < samples.length; i++) {
+      let sum = 0;
+      for (let k = 0; k < decimation; k++) sum += full[i * decimation + k];
+      samples[i] = sum / decimation;
+    }
+  }
+
   // Convert to 16-bit PCM and create WAV
   const buffer = new ArrayBuffer(44 + samples.length * 2);
   const view = new DataView(buffer);
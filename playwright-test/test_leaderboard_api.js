@@ -3,11 +3,11 @@
  * Tests: start game → analyze (mock) → submit to leaderboard
  *
  * Run: node test_leaderboard_api.js
- * Requires: backend running on http://localhost:8000
+ * Requires: backend running on http://localhost:8000 with DATABASE_URL set
+ * Exits non-zero on the first failed assertion.
  */
 
-const fs = require('fs');
-const path = require('path');
+const assert = require('node:assert/strict');
 
 const BASE = 'http://localhost:8000';
 
@@ -18,11 +18,13 @@ async function main() {
   console.log('1. Health check...');
   const health = await fetch(`${BASE}/api/health`).then(r => r.json());
   console.log('   OK:', health.status);
+  assert.equal(health.status, 'ok');
 
   // 2. GET leaderboard (before)
   console.log('\n2. GET /api/leaderboard...');
   const lb1 = await fetch(`${BASE}/api/leaderboard`).then(r => r.json());
   console.log('   Entries:', lb1.entries.length);
+  assert.ok(Array.isArray(lb1.entries));
 
   // 3. Start game
   console.log('\n3. POST /api/game/start...');
@@ -76,10 +78,7 @@ async function main() {
       body: formData,
     });
 
-    if (!resp.ok) {
-      console.log('   ERROR:', resp.status, await resp.text());
-      break;
-    }
+    assert.ok(resp.ok, `analyze failed: ${resp.status} ${await resp.clone().text()}`);
 
     lastResult = await resp.json();
     console.log('   passed:', lastResult.passed);
@@ -93,10 +92,8 @@ async function main() {
     if (lastResult.next_round) roundNum = lastResult.next_round;
   }
 
-  if (!lastResult || !lastResult.score_token) {
-    console.log('\n   ERROR: No score_token received. Cannot test leaderboard submission.');
-    process.exit(1);
-  }
+  assert.ok(lastResult?.game_over, 'game did not end within 5 attempts');
+  assert.ok(lastResult.score_token, 'no score_token on game over');
 
   // 6. Try to submit with INVALID token (should get 403)
   console.log('\n6. POST /api/leaderboard with FAKE token...');
@@ -111,8 +108,7 @@ async function main() {
     }),
   });
   console.log('   Status:', fakeResp.status, '(expected 403)');
-  const fakeBody = await fakeResp.json();
-  console.log('   Body:', JSON.stringify(fakeBody));
+  assert.equal(fakeResp.status, 403);
 
   // 7. Submit with VALID token
   console.log('\n7. POST /api/leaderboard with VALID token...');
@@ -127,9 +123,39 @@ async function main() {
     }),
   });
   console.log('   Status:', validResp.status, '(expected 200)');
+  assert.equal(validResp.status, 200);
   const validBody = await validResp.json();
+  const { ranks } = validBody;
   console.log('   player_rank:', validBody.player_rank);
-  console.log('   entries:', validBody.entries?.length);
+  console.log('   ranks by window:', JSON.stringify(ranks));
+  assert.deepEqual(Object.keys(ranks).sort(), ['all', 'daily', 'weekly']);
+  assert.equal(validBody.player_rank, ranks.all);
+  // A fresh entry is on every window's current board...
+  for (const window of ['daily', 'weekly', 'all']) {
+    assert.ok(Number.isInteger(ranks[window]) && ranks[window] >= 1, `${window} rank ${ranks[window]}`);
+  }
+  // ...and each window holds a subset of the next one's entries
+  assert.ok(ranks.daily <= ranks.weekly && ranks.weekly <= ranks.all, JSON.stringify(ranks));
+
+  // 7b. Time-windowed boards agree with the ranks
+  console.log('\n7b. GET /api/leaderboard?window=...');
+  for (const window of ['daily', 'weekly', 'all']) {
+    const lbw = await fetch(`${BASE}/api/leaderboard?window=${window}`).then(r => r.json());
+    assert.equal(lbw.window, window);
+    const scores = lbw.entries.map(e => e.score);
+    assert.deepEqual(scores, [...scores].sort((a, b) => b - a), `${window} board not sorted by score`);
+    // Ties rank after earlier entries, so ours is the last APITEST row with this score
+    const idx = lbw.entries.findLastIndex(e => e.name === 'APITEST' && e.score === lastResult.total_score);
+    console.log(`   ${window}: ${lbw.entries.length} entries, APITEST at ${idx + 1}, rank ${ranks[window]}`);
+    if (ranks[window] <= lbw.entries.length) {
+      assert.equal(idx + 1, ranks[window], `${window} board position vs rank`);
+    } else {
+      assert.ok(lbw.entries.every(e => e.score >= lastResult.total_score), `${window} board should be all ahead of us`);
+    }
+  }
+  const badWindow = await fetch(`${BASE}/api/leaderboard?window=yearly`);
+  console.log('   window=yearly status:', badWindow.status, '(expected 400)');
+  assert.equal(badWindow.status, 400);
 
   // 8. Test profanity filter
   console.log('\n8. POST /api/leaderboard with profane name...');
@@ -159,16 +185,17 @@ async function main() {
       }),
     });
     console.log('   Status:', profaneResp.status, '(expected 400)');
-    const profaneBody = await profaneResp.json();
-    console.log('   Body:', JSON.stringify(profaneBody));
+    assert.equal(profaneResp.status, 400);
   }
+  assert.ok(result2?.score_token, 'second game produced no score_token');
 
   // 9. Final leaderboard
   console.log('\n9. GET /api/leaderboard (final)...');
   const lb2 = await fetch(`${BASE}/api/leaderboard`).then(r => r.json());
   lb2.entries.forEach((e, i) => console.log(`   ${i + 1}. ${e.name} - ${e.score}`));
+  assert.ok(!lb2.entries.some(e => e.name === 'SHIT'), 'profane name reached the board');
 
-  console.log('\n=== DONE ===\n');
+  console.log('\n=== PASSED ===\n');
 }
 
 main().catch(e => {
@@ -0,0 +1,114 @@
+/**
+ * API-level test for replay detection.
+ * Tests: win round 1 with the bird call itself → replay the same WAV with
+ * leading padding (whole and partial hops, quieter, with white noise mixed
+ * in) in fresh sessions → each replay is flagged as replay_suspected.
+ *
+ * Run: node test_replay_api.js
+ * Requires: backend running on http://localhost:8000 (one worker, so every
+ * request sees the same replay index)
+ * Exits non-zero on the first failed assertion.
+ */
+
+const assert = require('node:assert/strict');
+
+const BASE = 'http://localhost:8000';
+
+// [leading zero samples, gain, white noise level in dBFS or null] — 512 samples is exactly one pyin hop
+const VARIANTS = [
+  [512, 1.0, null],
+  [700, 1.0, null],
+  [1500, 0.8, null],
+  [4410, 1.0, null],
+  [0, 1.0, -50],
+  [700, 1.0, -45],
+];
+
+// Deterministic standard normal samples (mulberry32 + Box-Muller)
+function gaussian(seed) {
+  return () => {
+    const u = [0, 0].map(() => {
+      seed = (seed + 0x6d2b79f5) | 0;
+      let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+      t ^= t + Math.imul(t ^ (t >>> 7), 61 | t);
+      return (((t ^ (t >>> 14)) >>> 0) + 1) / 4294967297;
+    });
+    return Math.sqrt(-2 * Math.log(u[0])) * Math.cos(2 * Math.PI * u[1]);
+  };
+}
+
+// Copy of a 16-bit PCM WAV with `padSamples` zero samples before the audio, scaled by `gain`,
+// with white noise at `noiseDb` dBFS added over the whole file when given
+function padWav(wav, padSamples, gain, noiseDb = null) {
+  let offset = 12;
+  let blockAlign = 2;
+  while (offset + 8 <= wav.length) {
+    const id = wav.toString('ascii', offset, offset + 4);
+    const size = wav.readUInt32LE(offset + 4);
+    if (id === 'fmt ') {
+      assert.equal(wav.readUInt16LE(offset + 8), 1, 'bird call is not PCM');
+      assert.equal(wav.readUInt16LE(offset + 22), 16, 'bird call is not 16-bit');
+      blockAlign = wav.readUInt16LE(offset + 20);
+    }
+    if (id === 'data') {
+      const data = wav.subarray(offset + 8, offset + 8 + size);
+      const out = Buffer.alloc(offset + 8 + padSamples * blockAlign + data.length);
+      wav.copy(out, 0, 0, offset + 8);
+      for (let i = 0; i + 1 < data.length; i += 2) {
+        out.writeInt16LE(Math.round(data.readInt16LE(i) * gain), offset + 8 + padSamples * blockAlign + i);
+      }
+      if (noiseDb !== null) {
+        const noise = gaussian(1);
+        const sigma = 32768 * 10 ** (noiseDb / 20);
+        for (let i = offset + 8; i + 1 < out.length; i += 2) {
+          out.writeInt16LE(Math.max(-32768, Math.min(32767, Math.round(out.readInt16LE(i) + sigma * noise()))), i);
+        }
+      }
+      out.writeUInt32LE(out.length - 8, 4);
+      out.writeUInt32LE(out.length - offset - 8, offset + 4);
+      return out;
+    }
+    offset += 8 + size + (size % 2);
+  }
+  throw new Error('No data chunk in bird call');
+}
+
+async function analyze(sessionId, wav) {
+  const formData = new FormData();
+  formData.append('audio', new Blob([wav], { type: 'audio/wav' }), 'recording.wav');
+  const resp = await fetch(`${BASE}/api/game/${sessionId}/analyze`, { method: 'POST', body: formData });
+  assert.equal(resp.status, 200, `analyze returned ${resp.status}: ${await resp.clone().text()}`);
+  return resp.json();
+}
+
+async function main() {
+  console.log('\n=== Replay Detection API Test ===\n');
+
+  // 1. Win round 1 by submitting the bird call it plays
+  console.log('1. Win round 1 with the bird call...');
+  const game = await fetch(`${BASE}/api/game/start`, { method: 'POST' }).then(r => r.json());
+  const wav = Buffer.from(await fetch(`${BASE}/api/game/${game.session_id}/bird-call`).then(r => r.arrayBuffer()));
+  const original = await analyze(game.session_id, wav);
+  console.log('   passed:', original.passed, 'replay_suspected:', original.replay_suspected);
+  assert.equal(original.passed, true, 'the bird call itself should win round 1');
+  // Not asserted: a server that already saw this WAV (an earlier run) flags it too
+
+  // 2. Replay it padded in fresh sessions
+  let step = 2;
+  for (const [pad, gain, noiseDb] of VARIANTS) {
+    const noise = noiseDb === null ? '' : `, noise at ${noiseDb} dBFS`;
+    console.log(`\n${step++}. Replay padded by ${pad} samples, gain ${gain}${noise}...`);
+    const replay = await fetch(`${BASE}/api/game/start`, { method: 'POST' }).then(r => r.json());
+    const result = await analyze(replay.session_id, padWav(wav, pad, gain, noiseDb));
+    console.log('   passed:', result.passed, 'replay_suspected:', result.replay_suspected);
+    assert.equal(result.passed, true);
+    assert.equal(result.replay_suspected, true, `replay padded by ${pad} samples${noise} was not flagged`);
+  }
+
+  console.log('\n=== PASSED ===\n');
+}
+
+main().catch(e => {
+  console.error('FATAL:', e);
+  process.exit(1);
+});
@@ -0,0 +1,134 @@
+/**
+ * API-level test for client pitch-track verification.
+ * Tests: submit the bird call with the f0 track the browser's recorder
+ * worklet computes for it (client_verified) → the same track shifted up
+ * 2 semitones (client_rejected, round lost) → the track cut to its first
+ * half (server_fallback, scored from the audio).
+ *
+ * The track comes from frontend/public/recorder-worklet.js itself, run in a
+ * vm context with a minimal AudioWorklet shim, so it matches what the web
+ * client sends.
+ *
+ * Run: node test_tamper_api.js
+ * Requires: backend running on http://localhost:8000
+ * Exits non-zero on the first failed assertion.
+ */
+
+const assert = require('node:assert/strict');
+const fs = require('node:fs');
+const path = require('node:path');
+const vm = require('node:vm');
+
+const BASE = 'http://localhost:8000';
+const WORKLET = path.join(__dirname, '..', 'frontend', 'public', 'recorder-worklet.js');
+const RENDER_QUANTUM = 128;
+
+// Mono float samples and sample rate of a 16-bit PCM WAV
+function decodeWav(wav) {
+  let offset = 12;
+  let sampleRate = 0;
+  while (offset + 8 <= wav.length) {
+    const id = wav.toString('ascii', offset, offset + 4);
+    const size = wav.readUInt32LE(offset + 4);
+    if (id === 'fmt ') {
+      assert.equal(wav.readUInt16LE(offset + 8), 1, 'bird call is not PCM');
+      assert.equal(wav.readUInt16LE(offset + 10), 1, 'bird call is not mono');
+      assert.equal(wav.readUInt16LE(offset + 22), 16, 'bird call is not 16-bit');
+      sampleRate = wav.readUInt32LE(offset + 12);
+    }
+    if (id === 'data') {
+      const samples = new Float32Array(size / 2);
+      for (let i = 0; i < samples.length; i++) samples[i] = wav.readInt16LE(offset + 8 + 2 * i) / 32768;
+      return { samples, sampleRate };
+    }
+    offset += 8 + size + (size % 2);
+  }
+  throw new Error('No data chunk in bird call');
+}
+
+// Run the recorder worklet over `samples` and collect its pitch track
+function workletPitchTrack(samples, sampleRate) {
+  const messages = [];
+  let Processor = null;
+  vm.runInNewContext(fs.readFileSync(WORKLET, 'utf8'), {
+    sampleRate,
+    Float32Array,
+    Math,
+    AudioWorkletProcessor: class {
+      constructor() {
+        this.port = { postMessage: m => messages.push(m) };
+      }
+    },
+    registerProcessor: (name, cls) => {
+      Processor = cls;
+    },
+  });
+  const processor = new Processor();
+  for (let i = 0; i < samples.length; i += RENDER_QUANTUM) {
+    processor.process([[samples.subarray(i, i + RENDER_QUANTUM)]]);
+  }
+  const info = messages.find(m => m.pitchTrackInfo).pitchTrackInfo;
+  const f0 = messages.filter(m => m.f0 !== undefined).map(m => m.f0);
+  return { ...info, f0 };
+}
+
+async function analyze(sessionId, wav, track) {
+  const formData = new FormData();
+  formData.append('audio', new Blob([wav], { type: 'audio/wav' }), 'recording.wav');
+  // Same encoding as frontend/src/api/gameApi.js
+  formData.append('f0', JSON.stringify(track.f0.map(v => Math.round(v * 100) / 100)));
+  formData.append('f0_hop_sec', String(track.hopSec));
+  formData.append('f0_start_sec', String(track.startSec));
+  const resp = await fetch(`${BASE}/api/game/${sessionId}/analyze`, { method: 'POST', body: formData });
+  assert.equal(resp.status, 200, `analyze returned ${resp.status}: ${await resp.clone().text()}`);
+  return resp.json();
+}
+
+async function submitFresh(wav, track) {
+  const game = await fetch(`${BASE}/api/game/start`, { method: 'POST' }).then(r => r.json());
+  return analyze(game.session_id, wav, track);
+}
+
+async function main() {
+  console.log('\n=== Client Pitch Track Verification API Test ===\n');
+
+  // 1. Track the bird call the way the browser would
+  console.log('1. Track the bird call with the recorder worklet...');
+  const game = await fetch(`${BASE}/api/game/start`, { method: 'POST' }).then(r => r.json());
+  const wav = Buffer.from(await fetch(`${BASE}/api/game/${game.session_id}/bird-call`).then(r => r.arrayBuffer()));
+  const { samples, sampleRate } = decodeWav(wav);
+  const honest = workletPitchTrack(samples, sampleRate);
+  const voiced = honest.f0.filter(v => v > 0).length;
+  console.log(`   ${honest.f0.length} frames, ${voiced} voiced`);
+  assert.ok(voiced > 20, 'worklet found almost no pitch in the bird call');
+
+  // 2. The honest track is used as-is
+  console.log('\n2. Submit the honest track...');
+  const result = await analyze(game.session_id, wav, honest);
+  console.log('   analysis_mode:', result.analysis_mode, 'passed:', result.passed);
+  assert.equal(result.analysis_mode, 'client_verified');
+  assert.equal(result.passed, true, 'the bird call with its own track should win round 1');
+
+  // 3. Shifted up 2 semitones: contradicts the audio, so the round is lost
+  console.log('\n3. Submit the track shifted up 2 semitones...');
+  const shifted = { ...honest, f0: honest.f0.map(v => v * 2 ** (2 / 12)) };
+  const rejected = await submitFresh(wav, shifted);
+  console.log('   analysis_mode:', rejected.analysis_mode, 'passed:', rejected.passed);
+  assert.equal(rejected.analysis_mode, 'client_rejected');
+  assert.equal(rejected.passed, false, 'a shifted track must not win');
+
+  // 4. Truncated: cannot be checked, so the audio is tracked server-side instead
+  console.log('\n4. Submit the first half of the track...');
+  const truncated = { ...honest, f0: honest.f0.slice(0, Math.floor(honest.f0.length / 2)) };
+  const fallback = await submitFresh(wav, truncated);
+  console.log('   analysis_mode:', fallback.analysis_mode, 'passed:', fallback.passed);
+  assert.equal(fallback.analysis_mode, 'server_fallback');
+  assert.equal(fallback.passed, true, 'server tracking of the bird call should still win');
+
+  console.log('\n=== PASSED ===\n');
+}
+
+main().catch(e => {
+  console.error('FATAL:', e);
+  process.exit(1);
+});